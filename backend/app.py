@@ -1,19 +1,34 @@
 import os
+import json
 import sqlite3
-from flask import Flask, request, jsonify, g
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, g, stream_with_context
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-import tempfile
-import whisper
-import Levenshtein
-import subprocess
-import shutil
-from g2p_en import G2p
 import sys
 import locale
-import nltk
-nltk.download('averaged_perceptron_tagger_eng')
+import logging
+import time
+# Nothing imported here pulls in torch, whisper, g2p_en or nltk; those load
+# on first use or in warm_up(), so CRUD-only workers start in well under a second.
+import audio as audio_io
+import auth
+import backends
+from catalog import LIST_FIELDS, catalog
+import db as db_layer
+import history as attempt_history
+import inference
+import jobs
+import leaderboard
+import metrics
+import model_registry
+import phoneme_errors
+import phonemes
+import result_cache
+import scoring
+import streaming
+import timing
+import user_stats
+import workers
 
 # We are removing the Epitran and panphon related imports, and the patch.
 # We are also keeping the locale settings for good measure, but the core fix
@@ -26,36 +41,99 @@ if sys.platform == "win32":
         pass
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "pronunciation.db")
+DB_PATH = db_layer.DB_PATH
+# DEBUG adds per-request pipeline tracing; INFO and above skip it entirely
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 
-app = Flask(__name__)
-CORS(app)
+log = logging.getLogger(__name__)
 
-# Check if ffmpeg is available
-try:
-    subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
-    FFMPEG_AVAILABLE = True
-except (FileNotFoundError, subprocess.CalledProcessError):
-    FFMPEG_AVAILABLE = False
-    print("WARNING: FFmpeg not found. Pronunciation analysis will not work.")
+bp = Blueprint("api", __name__)
+
+
+def create_app(warm=None):
+    """Build the Flask app.
+
+    The schema and its migrations are always brought up to date here.
+    `warm` (default: WARMUP_ON_START=1) also loads Whisper, G2P and the
+    challenge catalog before the first request instead of lazily on first use.
+    """
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(bp)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.teardown_appcontext(close_connection)
+    app.extensions["scoring_jobs"] = jobs.JobManager(app.app_context)
+    app.extensions["stream_sessions"] = streaming.SessionStore()
+    if not auth.SECRET_KEY:
+        log.warning(
+            "SECRET_KEY is not set; session tokens are signed with a per-process key "
+            "and stop working on restart or on any other worker."
+        )
+    with app.app_context():
+        # Tables and migrations only; challenge phonemes need G2P, which is warm-up's job
+        init_db(compute_phonemes=False)
+    if warm is None:
+        warm = os.environ.get("WARMUP_ON_START", "0") == "1"
+    if warm:
+        warm_up(app)
+    return app
+
+
+def warm_up(app):
+    """Load everything the scoring routes need, ahead of the first request."""
+    with app.app_context():
+        init_db()
+        catalog.load(get_db())
+    if workers.SCORING_WORKERS > 0:
+        # Models and G2P live in the scoring worker processes
+        workers.get_pool()
+    else:
+        phonemes.warm_up()
+        model_registry.warm_up()
+    if not audio_io.ffmpeg_available():
+        log.warning("FFmpeg not found. Pronunciation analysis will not work.")
 
 
 def get_db():
+    # Checked out of the shared pool (WAL, busy timeout, statement cache)
     db = getattr(g, "_database", None)
     if db is None:
-        db = g._database = sqlite3.connect(DB_PATH)
-        db.row_factory = sqlite3.Row
+        db = g._database = db_layer.get_connection()
     return db
 
 
-@app.teardown_appcontext
 def close_connection(exception):
+    # The connection goes back to the pool rather than being closed
     db = getattr(g, "_database", None)
     if db is not None:
-        db.close()
+        db_layer.release(db)
 
 
-def init_db():
+def _start_timer():
+    g._request_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = getattr(g, "_request_started", None)
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+            status=response.status_code,
+        )
+    return response
+
+
+def init_db(compute_phonemes=True):
+    """Create or migrate the schema and seed the sample challenges.
+
+    With `compute_phonemes` off, challenge words are left without
+    precomputed phonemes so no model is loaded; the first scoring request,
+    which loads G2P anyway, fills them in.
+    """
     db = get_db()
     cur = db.cursor()
     
@@ -76,7 +154,8 @@ def init_db():
         word TEXT NOT NULL,
         difficulty TEXT NOT NULL,
         points INTEGER NOT NULL,
-        description TEXT
+        description TEXT,
+        phonemes TEXT
     );
 
     CREATE TABLE IF NOT EXISTS user_challenges (
@@ -117,7 +196,51 @@ def init_db():
         # Add challenge_id column if it doesn't exist
         cur.execute("ALTER TABLE attempts ADD COLUMN challenge_id INTEGER DEFAULT NULL")
         # Add foreign key constraint (Note: SQLite doesn't support adding foreign key constraints to existing tables)
-        print("Added challenge_id column to attempts table")
+        log.info("Added challenge_id column to attempts table")
+
+    # Profile rollup; built from existing attempts the first time it appears
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_stats'")
+    if cur.fetchone() is None:
+        cur.executescript(user_stats.SCHEMA)
+        log.info("Backfilled user_stats for %d users", user_stats.backfill(db))
+
+    # Per-user phoneme error profile behind /challenges/recommended; existing
+    # attempts need G2P, so they are folded in by `python phoneme_errors.py --backfill`
+    cur.executescript(phoneme_errors.SCHEMA)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_user_challenges_user ON user_challenges(user_id, accuracy)")
+
+    # Keyset pagination for /history walks this index newest-first
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_attempts_user_created ON attempts(user_id, created_at, id)")
+
+    # Leaderboard support: points index and weekly rollup
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_points ON users(points DESC)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_points (
+            week TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            points INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (week, user_id),
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_weekly_points_rank ON weekly_points(week, points DESC)")
+
+    # Optional on-disk tier of the transcription result cache
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            key TEXT PRIMARY KEY,
+            transcript TEXT,
+            phonemes TEXT,
+            created_at REAL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_created ON result_cache(created_at)")
+
+    # Precomputed G2P output for challenge words, so scoring can skip the target side
+    cur.execute("PRAGMA table_info(challenges)")
+    if 'phonemes' not in [column[1] for column in cur.fetchall()]:
+        cur.execute("ALTER TABLE challenges ADD COLUMN phonemes TEXT")
+        log.info("Added phonemes column to challenges table")
     
     # Insert sample challenges if they don't exist
     challenges_data = [
@@ -153,51 +276,105 @@ def init_db():
             "INSERT INTO challenges (word, difficulty, points, description) VALUES (?, ?, ?, ?)",
             challenges_data
         )
-        print("Inserted sample challenges")
+        log.info("Inserted sample challenges")
+
+    # Fill in phonemes for new challenges and ones added before the column existed
+    if compute_phonemes:
+        _fill_challenge_phonemes(db)
+    else:
+        cur.execute("SELECT COUNT(*) FROM challenges WHERE phonemes IS NULL")
+        missing = cur.fetchone()[0]
+        if missing:
+            log.warning(
+                "%d challenges have no precomputed phonemes; recommendations skip them "
+                "until the first scored attempt fills them in (or set WARMUP_ON_START=1)",
+                missing,
+            )
     
     db.commit()
+    # Reload the catalog so seeded or updated challenges are served
+    catalog.invalidate()
 
 
-def levenshtein(a: str, b: str) -> int:
-    a = a or ""
-    b = b or ""
-    n, m = len(a), len(b)
-    if n == 0:
-        return m
-    if m == 0:
-        return n
-    dp = [[0] * (m + 1) for _ in range(n + 1)]
-    for i in range(n + 1):
-        dp[i][0] = i
-    for j in range(m + 1):
-        dp[0][j] = j
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            dp[i][j] = min(
-                dp[i - 1][j] + 1, dp[i][j - 1] + 1, dp[i - 1][j - 1] + cost
-            )
-    return dp[n][m]
+def _fill_challenge_phonemes(conn):
+    rows = conn.execute("SELECT id, word FROM challenges WHERE phonemes IS NULL").fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE challenges SET phonemes = ? WHERE id = ?",
+            [(phonemes.to_column(workers.text_phonemes(word)), cid) for cid, word in rows]
+        )
+        log.info("Computed phonemes for %d challenges", len(rows))
+    return len(rows)
+
+
+_challenge_phonemes_checked = False
 
 
-def similarity_score(a: str, b: str) -> float:
-    a = (a or "").strip().lower()
-    b = (b or "").strip().lower()
-    if len(a) == 0 and len(b) == 0:
-        return 100.0
-    dist = levenshtein(a, b)
-    max_len = max(len(a), len(b))
-    score = max(0.0, 100.0 * (1 - dist / (max_len if max_len > 0 else 1)))
-    return round(score, 2)
+def _ensure_challenge_phonemes():
+    """Fill challenge phonemes that a cold start left NULL, once per process.
+
+    Called after a scoring request has used G2P, so filling them costs a few
+    lookups rather than loading G2P just for this.
+    """
+    global _challenge_phonemes_checked
+    if _challenge_phonemes_checked:
+        return
+    _challenge_phonemes_checked = True
+    try:
+        if db_layer.write(_fill_challenge_phonemes):
+            catalog.invalidate()
+    except Exception:
+        # Scoring still works without them; the next process start retries
+        log.exception("Could not fill in challenge phonemes")
 
 
-@app.route("/init-db", methods=["POST"])
+@bp.route("/init-db", methods=["POST"])
 def route_init_db():
     init_db()
     return jsonify({"status": "ok"}), 200
 
 
-@app.route("/signup", methods=["POST"])
+@bp.route("/models/reload", methods=["POST"])
+def route_reload_models():
+    auth.require_admin()
+    if workers.SCORING_WORKERS > 0:
+        # Fresh worker processes load every configured model from scratch
+        return jsonify({"status": "ok", "recycled_workers": workers.get_pool().recycle()}), 200
+    name = (request.json or {}).get("model") if request.is_json else None
+    try:
+        reloaded = model_registry.reload(name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": "ok", "reloaded": reloaded}), 200
+
+
+@bp.route("/inference/stats", methods=["GET"])
+def route_inference_stats():
+    return jsonify({
+        "backend": backends.TRANSCRIBE_BACKEND,
+        "queues": inference.stats(),
+        "workers": workers.stats(),
+    }), 200
+
+
+@bp.route("/metrics", methods=["GET"])
+def route_metrics():
+    # Queue depths are sampled at scrape time
+    for queue_stats in inference.stats():
+        metrics.QUEUE_DEPTH.set(queue_stats["depth"], queue=f"inference:{queue_stats['model']}")
+    metrics.QUEUE_DEPTH.set(current_app.extensions["scoring_jobs"].pending(), queue="jobs")
+    pool = workers.stats()
+    if pool is not None:
+        metrics.QUEUE_DEPTH.set(sum(w["in_flight"] for w in pool["workers"]), queue="workers")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@bp.errorhandler(auth.AuthError)
+def auth_error(e):
+    return jsonify({"error": str(e)}), e.status
+
+
+@bp.route("/signup", methods=["POST"])
 def signup():
     data = request.json
     username = data.get("username", "").strip()
@@ -209,15 +386,16 @@ def signup():
     try:
         cur.execute(
             "INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)",
-            (username, generate_password_hash(password), datetime.utcnow().isoformat()),
+            (username, auth.hash_password(password), datetime.utcnow().isoformat()),
         )
         db.commit()
+        leaderboard.user_added(cur.lastrowid)
         return jsonify({"status": "ok"}), 201
     except sqlite3.IntegrityError:
         return jsonify({"error": "username already exists"}), 400
 
 
-@app.route("/login", methods=["POST"])
+@bp.route("/login", methods=["POST"])
 def login():
     data = request.json
     username = data.get("username", "").strip()
@@ -228,367 +406,523 @@ def login():
     row = cur.fetchone()
     if not row:
         return jsonify({"error": "invalid username/password"}), 400
-    if not check_password_hash(row["password_hash"], password):
+    # Repeat logins within LOGIN_CACHE_TTL_SECONDS skip the PBKDF2 check
+    if not auth.credentials.check(username, password, row["password_hash"]):
         return jsonify({"error": "invalid username/password"}), 400
+    if auth.needs_rehash(row["password_hash"]):
+        # Move the stored hash to the current PASSWORD_HASH_ITERATIONS
+        cur.execute("UPDATE users SET password_hash = ? WHERE id = ?", (auth.hash_password(password), row["id"]))
+        db.commit()
     user = {
         "id": row["id"],
         "username": row["username"],
         "points": row["points"],
         "level": row["level"],
     }
-    return jsonify({"status": "ok", "user": user}), 200
+    return jsonify({"status": "ok", "user": user, "token": auth.issue_token(user)}), 200
+
+
+def _wants_async():
+    # Opt-in per request so the existing frontend keeps its synchronous flow
+    flag = request.args.get("async") or request.form.get("async") or ""
+    if flag.lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
 
 
-@app.route("/practice", methods=["POST"])
+def _submit_or_run(kind, fn, *args):
+    if not _wants_async():
+        payload, status = fn(*args)
+        return jsonify(payload), status
+    try:
+        job = current_app.extensions["scoring_jobs"].submit(kind, fn, *args)
+    except jobs.QueueFull as e:
+        return jsonify({"error": f"Server busy: {str(e)}"}), 503
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }), 202
+
+
+def _points_for(points, cached):
+    # Duplicate uploads still record an attempt; CACHE_HIT_POINTS decides the reward
+    if cached and result_cache.CACHE_HIT_POINTS == "none":
+        return 0
+    return points
+
+
+def _store_attempt(conn, user_id, target_text, transcript, accuracy, points_earned, challenge=None, alignment=None):
+    """Write an attempt and everything derived from it; runs inside db_layer.write()."""
+    cur = conn.cursor()
+    created_at = datetime.utcnow().isoformat()
+    challenge_id = challenge["id"] if challenge else None
+    cur.execute(
+        "INSERT INTO attempts (user_id, target_text, transcript, accuracy, points_earned, created_at, challenge_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (user_id, target_text, transcript, accuracy, points_earned, created_at, challenge_id),
+    )
+    if challenge:
+        # Store/update user_challenges table
+        cur.execute(
+            "INSERT OR REPLACE INTO user_challenges (user_id, challenge_id, completed, accuracy, points_earned, completed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, challenge_id, True, accuracy, points_earned, created_at)
+        )
+    user_stats.record_attempt(cur, user_id, accuracy, created_at, challenge["difficulty"] if challenge else None)
+    if alignment:
+        phoneme_errors.record_alignment(cur, user_id, alignment)
+    # Points and level in a single UPDATE ... RETURNING
+    new_points, new_level = db_layer.award_points(cur, user_id, points_earned)
+    weekly_total = leaderboard.record_weekly(cur, user_id, points_earned)
+    return new_points, new_level, weekly_total
+
+
+def _transcribe_upload(audio_bytes, route, decode_options=None):
+    """Decode, trim and transcribe an upload; returns (transcript, phonemes, cached).
+
+    Results are cached by content hash, so a retried or resubmitted recording
+    skips ffmpeg, Whisper and G2P entirely. The rest runs in a scoring worker
+    process when SCORING_WORKERS is set.
+    """
+    decode_options = decode_options or {}
+    db = get_db()
+    key = result_cache.cache.key_for(
+        audio_bytes, model_registry.model_name_for(route), decode_options, backends.get_backend().name
+    )
+    with timing.span("result_cache"):
+        cached = result_cache.cache.get(key, db)
+    metrics.RESULT_CACHE.inc(result="hit" if cached is not None else "miss")
+    if cached is not None:
+        log.debug("Result cache hit.")
+        return cached["transcript"], phonemes.from_column(cached["phonemes"]), True
+
+    # Spoken phonemes come back in the same space-separated form as challenges.phonemes
+    try:
+        transcript, spoken_column = workers.transcribe(audio_bytes, route, decode_options)
+    except audio_io.AudioDecodeError:
+        metrics.FFMPEG_FAILURES.inc()
+        raise
+    result_cache.cache.put(key, {"transcript": transcript, "phonemes": spoken_column}, db)
+    return transcript, phonemes.from_column(spoken_column), False
+
+
+def score_practice(user_id, target_text, audio_bytes, transcribe=None):
+    """Run the full practice pipeline and persist the attempt.
+
+    Returns ``(payload, status_code)`` so it can back both the synchronous
+    route and a queued scoring job. A streamed recording passes `transcribe`,
+    which returns the same ``(transcript, phonemes, cached)`` as
+    _transcribe_upload(), instead of `audio_bytes`.
+    """
+    try:
+        if transcribe is not None:
+            transcript, spoken_phonemes, cached = transcribe()
+        else:
+            transcript, spoken_phonemes, cached = _transcribe_upload(audio_bytes, "practice")
+        
+        log.debug("Starting phoneme conversion.")
+        
+        # G2P output is cached per normalized text
+        with timing.span("g2p"):
+            target_phonemes = workers.text_phonemes(target_text)
+        _ensure_challenge_phonemes()
+        log.debug("Target phonemes: %s", target_phonemes)
+        log.debug("Spoken phonemes: %s", spoken_phonemes)
+        log.debug("Phoneme conversion completed.")
+
+        log.debug("Calculating accuracy.")
+        with timing.span("score"):
+            result = scoring.score(target_phonemes, spoken_phonemes)
+        accuracy = result.accuracy
+
+        log.debug("Final accuracy: %s", accuracy)
+        log.debug("Storing results in database.")
+        
+        points_earned = _points_for(int(round(accuracy / 10)), cached)
+
+        with timing.span("db_write"):
+            new_points, new_level, weekly_total = db_layer.write(
+                _store_attempt, user_id, target_text, transcript, accuracy, points_earned, None, result.alignment
+            )
+        leaderboard.points_awarded(user_id, new_points, weekly_total)
+
+        log.debug("Returning results.")
+        return {
+            "accuracy": accuracy,
+            "target_text": target_text,
+            "transcript": transcript,
+            "points_earned": points_earned,
+            "new_points": new_points,
+            "new_level": new_level,
+            "cached": cached,
+            "phonemes": result.alignment,
+        }, 200
+    except Exception as e:
+        log.exception("Error during practice scoring")
+        return {"error": f"Processing failed: {str(e)}"}, 500
+
+
+@bp.route("/practice", methods=["POST"])
 def practice():
     target_text = request.form.get("target_text", "").strip()
-    user_id = request.form.get("user_id")
+    user_id = auth.request_user_id(request.form.get("user_id"))
 
-    print("DEBUG: Starting practice function")
+    log.debug("Starting practice function")
 
-    if not FFMPEG_AVAILABLE:
-        print("DEBUG: FFmpeg not available.")
+    if not audio_io.ffmpeg_available():
+        log.debug("FFmpeg not available.")
         return jsonify({"error": "FFmpeg is not installed on the server. Please install it."}), 500
 
     if not target_text or not user_id:
-        print("DEBUG: Missing target_text or user_id.")
+        log.debug("Missing target_text or user_id.")
         return jsonify({"error": "target_text and user_id required"}), 400
 
     audio = request.files.get("audio")
     if not audio:
-        print("DEBUG: Missing audio file.")
+        log.debug("Missing audio file.")
         return jsonify({"error": "audio required"}), 400
 
-    temp_dir = tempfile.mkdtemp()
-    audio_path_webm = os.path.join(temp_dir, "recording.webm")
-    audio_path_wav = os.path.join(temp_dir, "recording.wav")
+    with timing.span("upload_read"):
+        audio_bytes = audio.read()
+    return _submit_or_run("practice", score_practice, user_id, target_text, audio_bytes)
 
-    try:
-        print("DEBUG: Saving audio file.")
-        audio.save(audio_path_webm)
-
-        print("DEBUG: Converting audio with FFmpeg.")
-        try:
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", audio_path_webm, "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000", audio_path_wav],
-                check=True,
-                capture_output=True,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"DEBUG: FFmpeg conversion failed. Stderr: {e.stderr.decode('utf-8', errors='ignore')}")
-            raise ValueError(f"Audio conversion failed: {e.stderr.decode('utf-8', errors='ignore')}")
 
-        print("DEBUG: Audio conversion completed.")
-        
-        if not os.path.exists(audio_path_wav) or os.path.getsize(audio_path_wav) == 0:
-            raise ValueError("Failed to convert audio file or file is empty.")
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = current_app.extensions["scoring_jobs"].get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
 
-        print("DEBUG: Loading Whisper model.")
-        model = whisper.load_model("base")
-        
-        print("DEBUG: Transcribing audio.")
-        whisper_result = model.transcribe(audio_path_wav, fp16=False)
-        transcript = whisper_result.get("text", "").strip()
-        
-        print(f"DEBUG: Transcription completed: '{transcript}'")
-        
-        if not transcript:
-            raise ValueError("Could not transcribe audio. Please try again.")
-        
-        print("DEBUG: Starting phoneme conversion.")
-        
-        # Initialize the G2P converter
-        g2p = G2p()
-        
-        # G2p returns a list of phonemes, so we join them to create a string
-        target_phonemes = "".join(g2p(target_text.lower()))
-        print(f"DEBUG: Target phonemes: '{target_phonemes}'")
-
-        spoken_phonemes = "".join(g2p(transcript.lower()))
-        print(f"DEBUG: Spoken phonemes: '{spoken_phonemes}'")
-        print("DEBUG: Phoneme conversion completed.")
-
-        print("DEBUG: Calculating accuracy.")
-        max_len = max(len(target_phonemes), len(spoken_phonemes))
-        if max_len == 0:
-            accuracy = 100.0
-        else:
-            dist = Levenshtein.distance(target_phonemes, spoken_phonemes)
-            accuracy = round(100 * (1 - dist / max_len), 2)
 
-        print(f"DEBUG: Final accuracy: {accuracy}")
-        print("DEBUG: Storing results in database.")
-        
-        points_earned = int(round(accuracy / 10))
+@bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    job = current_app.extensions["scoring_jobs"].get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
 
-        db = get_db()
-        cur = db.cursor()
-        cur.execute(
-            "INSERT INTO attempts (user_id, target_text, transcript, accuracy, points_earned, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, target_text, transcript, accuracy, points_earned, datetime.utcnow().isoformat()),
-        )
-        cur.execute("UPDATE users SET points = points + ? WHERE id = ?", (points_earned, user_id))
-        cur.execute("SELECT points FROM users WHERE id = ?", (user_id,))
-        new_points = cur.fetchone()["points"]
-        new_level = 1 + new_points // 100
-        cur.execute("UPDATE users SET level = ? WHERE id = ?", (new_level, user_id))
-        db.commit()
+    def stream():
+        yield f"event: status\ndata: {json.dumps({'status': job.status})}\n\n"
+        # Comment lines keep proxies from closing an idle connection
+        while not job.wait(timeout=15):
+            yield ": keep-alive\n\n"
+        yield f"event: result\ndata: {json.dumps(job.to_dict())}\n\n"
 
-        print("DEBUG: Returning results.")
-        return jsonify(
-            {
-                "accuracy": accuracy,
-                "target_text": target_text,
-                "transcript": transcript,
-                "points_earned": points_earned,
-                "new_points": new_points,
-                "new_level": new_level,
-            }
-        )
-    except Exception as e:
-        print(f"DEBUG: Error during practice endpoint: {str(e)}")
-        print(f"DEBUG: Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Processing failed: {str(e)}"}), 500
-    finally:
-        print("DEBUG: Cleaning up temporary files.")
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
-@app.route("/leaderboard", methods=["GET"])
-def leaderboard():
+@bp.route("/leaderboard", methods=["GET"])
+def leaderboard_page():
+    window = request.args.get("window", "all")
+    if window == "weekly":
+        window = request.args.get("week") or leaderboard.week_key()
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), leaderboard.MAX_PAGE_SIZE)
+        cursor = request.args.get("cursor")
+        cursor = leaderboard.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "invalid cursor or limit"}), 400
+
     db = get_db()
-    cur = db.cursor()
-    cur.execute("SELECT username, points, level FROM users ORDER BY points DESC LIMIT 20")
-    rows = cur.fetchall()
-    data = [dict(r) for r in rows]
-    return jsonify({"leaderboard": data})
+    entries, next_cursor = leaderboard.get_board(db, window).page(cursor, limit)
+    users = {}
+    if entries:
+        ids = [user_id for _, user_id, _ in entries]
+        rows = db.execute(
+            f"SELECT id, username, level FROM users WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        users = {row["id"]: row for row in rows}
+    data = [
+        {
+            "rank": rank,
+            "username": users[user_id]["username"],
+            "points": points,
+            "level": users[user_id]["level"],
+        }
+        for rank, user_id, points in entries
+        if user_id in users
+    ]
+    return jsonify({"leaderboard": data, "next_cursor": next_cursor, "window": window})
+
+
+@bp.route("/leaderboard/rank", methods=["GET"])
+def leaderboard_rank():
+    user_id = auth.request_user_id(request.args.get("user_id", type=int))
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+    window = request.args.get("window", "all")
+    if window == "weekly":
+        window = request.args.get("week") or leaderboard.week_key()
+
+    found = leaderboard.get_board(get_db(), window).rank(user_id)
+    if found is None:
+        return jsonify({"error": "User not ranked"}), 404
+    rank, points = found
+    return jsonify({"user_id": user_id, "rank": rank, "points": points, "window": window})
 
 # history page
-@app.route("/history", methods=["GET"])
+@bp.route("/history", methods=["GET"])
 def history():
-    user_id = request.args.get("user_id")
+    user_id = auth.request_user_id(request.args.get("user_id"))
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
-    
+
+    try:
+        before = request.args.get("before")
+        filters = {
+            "before": attempt_history.decode_cursor(before) if before else None,
+            "challenge_id": request.args.get("challenge_id", type=int),
+            "date_from": request.args.get("from"),
+            "date_to": request.args.get("to"),
+        }
+        limit = int(request.args.get("limit", attempt_history.DEFAULT_LIMIT))
+        limit = min(max(limit, 1), attempt_history.MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "invalid cursor or limit"}), 400
+
     db = get_db()
-    cur = db.cursor()
-    cur.execute(
-        "SELECT target_text, transcript, accuracy, points_earned, created_at, challenge_id FROM attempts WHERE user_id = ? ORDER BY created_at DESC LIMIT 50",
-        (user_id,)
-    )
-    rows = cur.fetchall()
-    history = [dict(row) for row in rows]
-    return jsonify({"history": history})
+    if request.args.get("format") == "ndjson":
+        # Streams the full (filtered) history without building it in memory
+        return Response(
+            stream_with_context(attempt_history.export_ndjson(db, user_id, **filters)),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=history-{user_id}.ndjson"},
+        )
+
+    rows, next_cursor = attempt_history.page(db, user_id, limit, **filters)
+    return jsonify({"history": rows, "next_before": next_cursor})
 
 #challenges page
-@app.route("/challenges", methods=["GET"])
+def _conditional(payload, etag):
+    # The catalog rarely changes, so let the browser revalidate with If-None-Match
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@bp.route("/challenges", methods=["GET"])
 def get_challenges():
     difficulty = request.args.get("difficulty", "easy")
-    db = get_db()
-    cur = db.cursor()
-    cur.execute(
-        "SELECT id, word, difficulty, points, description FROM challenges WHERE difficulty = ? ORDER BY word",
-        (difficulty,)
-    )
-    rows = cur.fetchall()
-    challenges = [dict(row) for row in rows]
-    return jsonify({"challenges": challenges})
+    snapshot = catalog.current(get_db())
+    return _conditional({"challenges": snapshot.by_difficulty(difficulty)}, snapshot.etag)
 
-@app.route("/challenge/<int:challenge_id>", methods=["GET"])
+@bp.route("/challenge/<int:challenge_id>", methods=["GET"])
 def get_challenge(challenge_id):
-    db = get_db()
-    cur = db.cursor()
-    cur.execute("SELECT * FROM challenges WHERE id = ?", (challenge_id,))
-    row = cur.fetchone()
-    if not row:
+    snapshot = catalog.current(get_db())
+    challenge = snapshot.get(challenge_id)
+    if not challenge:
         return jsonify({"error": "Challenge not found"}), 404
-    challenge = dict(row)
-    return jsonify({"challenge": challenge})
+    return _conditional({"challenge": challenge}, snapshot.etag)
+
+@bp.route("/challenges/recommended", methods=["GET"])
+def recommended_challenges():
+    user_id = auth.request_user_id(request.args.get("user_id", type=int))
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
 
-@app.route("/challenge/practice", methods=["POST"])
+    # Profile rows and the catalog's phoneme index only; no scan, no G2P
+    db = get_db()
+    snapshot = catalog.current(db)
+    weak = phoneme_errors.weak_phonemes(db, user_id)
+    mastered = phoneme_errors.mastered_challenges(db, user_id)
+    picks = [
+        dict({f: row[f] for f in LIST_FIELDS}, targets=targets)
+        for row, targets in phoneme_errors.recommend(snapshot, weak, limit, mastered)
+    ]
+    if not picks:
+        # Not enough attempts yet to know what to practise; start easy
+        picks = [dict(c, targets=[]) for c in snapshot.by_difficulty("easy") if c["id"] not in mastered][:limit]
+    return jsonify({
+        "challenges": picks,
+        "weak_phonemes": [
+            {"phoneme": phoneme, "error_rate": round(rate, 3), "attempts": attempts}
+            for phoneme, rate, attempts in weak
+        ],
+    })
+
+def _challenge_decode_options(challenge):
+    # Known single-word targets can use the constrained fast decoder
+    if challenge["difficulty"] in inference.FAST_PATH_DIFFICULTIES:
+        return inference.fast_path_options(challenge["word"])
+    return {}
+
+
+def score_challenge(user_id, challenge, audio_bytes, transcribe=None):
+    """Challenge counterpart of score_practice(); `challenge` is the row as a dict."""
+    target_text = challenge["word"]
+    try:
+        if transcribe is not None:
+            transcript, spoken_phonemes, cached = transcribe()
+        else:
+            transcript, spoken_phonemes, cached = _transcribe_upload(
+                audio_bytes, "challenge", _challenge_decode_options(challenge)
+            )
+        
+        log.debug("Starting phoneme conversion.")
+        
+        # Challenge words are precomputed by init_db(); only the transcript needs G2P
+        if challenge["phonemes"]:
+            target_phonemes = phonemes.from_column(challenge["phonemes"])
+        else:
+            with timing.span("g2p"):
+                target_phonemes = workers.text_phonemes(target_text)
+            _ensure_challenge_phonemes()
+
+        log.debug("Calculating accuracy.")
+        with timing.span("score"):
+            result = scoring.score(target_phonemes, spoken_phonemes)
+        accuracy = result.accuracy
+
+        # Calculate points based on challenge difficulty and accuracy
+        base_points = challenge["points"]
+        points_earned = _points_for(int(round((accuracy / 100) * base_points)), cached)
+
+        log.debug("Storing challenge results in database.")
+        
+        # Attempt, user_challenges row, stats and points commit together
+        with timing.span("db_write"):
+            new_points, new_level, weekly_total = db_layer.write(
+                _store_attempt, user_id, target_text, transcript, accuracy, points_earned, challenge,
+                result.alignment,
+            )
+        leaderboard.points_awarded(user_id, new_points, weekly_total)
+
+        log.debug("Returning challenge results.")
+        return {
+            "accuracy": accuracy,
+            "target_text": target_text,
+            "transcript": transcript,
+            "points_earned": points_earned,
+            "new_points": new_points,
+            "new_level": new_level,
+            "cached": cached,
+            "phonemes": result.alignment,
+            "challenge": challenge
+        }, 200
+    except Exception as e:
+        log.exception("Error during challenge practice")
+        return {"error": f"Processing failed: {str(e)}"}, 500
+
+
+@bp.route("/challenge/practice", methods=["POST"])
 def challenge_practice():
     challenge_id = request.form.get("challenge_id")
-    user_id = request.form.get("user_id")
+    user_id = auth.request_user_id(request.form.get("user_id"))
 
-    print("DEBUG: Starting challenge practice function")
+    log.debug("Starting challenge practice function")
 
-    if not FFMPEG_AVAILABLE:
+    if not audio_io.ffmpeg_available():
         return jsonify({"error": "FFmpeg is not installed on the server."}), 500
 
     if not challenge_id or not user_id:
         return jsonify({"error": "challenge_id and user_id required"}), 400
 
-    # Get challenge details
-    db = get_db()
-    cur = db.cursor()
-    cur.execute("SELECT * FROM challenges WHERE id = ?", (challenge_id,))
-    challenge = cur.fetchone()
+    # Challenge word, points and phonemes come from the in-memory catalog
+    challenge = None
+    if challenge_id.isdigit():
+        challenge = catalog.current(get_db()).get(int(challenge_id))
     if not challenge:
         return jsonify({"error": "Challenge not found"}), 404
-
-    target_text = challenge["word"]
     
     audio = request.files.get("audio")
     if not audio:
         return jsonify({"error": "audio required"}), 400
 
-    temp_dir = tempfile.mkdtemp()
-    audio_path_webm = os.path.join(temp_dir, "recording.webm")
-    audio_path_wav = os.path.join(temp_dir, "recording.wav")
+    with timing.span("upload_read"):
+        audio_bytes = audio.read()
+    return _submit_or_run("challenge", score_challenge, user_id, challenge, audio_bytes)
 
-    try:
-        print("DEBUG: Saving audio file.")
-        audio.save(audio_path_webm)
-
-        print("DEBUG: Converting audio with FFmpeg.")
-        subprocess.run(
-            ["ffmpeg", "-y", "-i", audio_path_webm, "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000", audio_path_wav],
-            check=True,
-            capture_output=True,
-        )
+@bp.route("/stream", methods=["POST"])
+def stream_start():
+    """Open a streaming session for a practice (target_text) or challenge
+    (challenge_id) attempt; the recording follows in chunks."""
+    data = request.get_json(silent=True) or request.form
+    user_id = auth.request_user_id(data.get("user_id"))
+    target_text = (data.get("target_text") or "").strip()
+    challenge_id = str(data.get("challenge_id") or "")
 
-        print("DEBUG: Audio conversion completed.")
-        
-        if not os.path.exists(audio_path_wav) or os.path.getsize(audio_path_wav) == 0:
-            raise ValueError("Failed to convert audio file or file is empty.")
+    if not audio_io.ffmpeg_available():
+        return jsonify({"error": "FFmpeg is not installed on the server."}), 500
+    if not user_id or not (target_text or challenge_id):
+        return jsonify({"error": "user_id and target_text or challenge_id required"}), 400
 
-        print("DEBUG: Loading Whisper model.")
-        model = whisper.load_model("base")
-        
-        print("DEBUG: Transcribing audio.")
-        whisper_result = model.transcribe(audio_path_wav, fp16=False)
-        transcript = whisper_result.get("text", "").strip()
-        
-        print(f"DEBUG: Transcription completed: '{transcript}'")
-        
-        if not transcript:
-            raise ValueError("Could not transcribe audio. Please try again.")
-        
-        print("DEBUG: Starting phoneme conversion.")
-        
-        # Initialize the G2P converter
-        g2p = G2p()
-        
-        # G2p returns a list of phonemes, so we join them to create a string
-        target_phonemes = "".join(g2p(target_text.lower()))
-        spoken_phonemes = "".join(g2p(transcript.lower()))
-
-        print("DEBUG: Calculating accuracy.")
-        max_len = max(len(target_phonemes), len(spoken_phonemes))
-        if max_len == 0:
-            accuracy = 100.0
+    sessions = current_app.extensions["stream_sessions"]
+    try:
+        if challenge_id:
+            challenge = None
+            if challenge_id.isdigit():
+                challenge = catalog.current(get_db()).get(int(challenge_id))
+            if not challenge:
+                return jsonify({"error": "Challenge not found"}), 404
+            session = sessions.create(
+                "challenge", "challenge", (user_id, challenge), _challenge_decode_options(challenge)
+            )
         else:
-            dist = Levenshtein.distance(target_phonemes, spoken_phonemes)
-            accuracy = round(100 * (1 - dist / max_len), 2)
-
-        # Calculate points based on challenge difficulty and accuracy
-        base_points = challenge["points"]
-        points_earned = int(round((accuracy / 100) * base_points))
-
-        print("DEBUG: Storing challenge results in database.")
-        
-        # Store in attempts table with challenge_id
-        cur.execute(
-            "INSERT INTO attempts (user_id, target_text, transcript, accuracy, points_earned, created_at, challenge_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (user_id, target_text, transcript, accuracy, points_earned, datetime.utcnow().isoformat(), challenge_id),
-        )
-        
-        # Store/update user_challenges table
-        cur.execute(
-            "INSERT OR REPLACE INTO user_challenges (user_id, challenge_id, completed, accuracy, points_earned, completed_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, challenge_id, True, accuracy, points_earned, datetime.utcnow().isoformat())
-        )
-        
-        # Update user points and level
-        cur.execute("UPDATE users SET points = points + ? WHERE id = ?", (points_earned, user_id))
-        cur.execute("SELECT points FROM users WHERE id = ?", (user_id,))
-        new_points = cur.fetchone()["points"]
-        new_level = 1 + new_points // 100
-        cur.execute("UPDATE users SET level = ? WHERE id = ?", (new_level, user_id))
-        db.commit()
-
-        print("DEBUG: Returning challenge results.")
-        return jsonify(
-            {
-                "accuracy": accuracy,
-                "target_text": target_text,
-                "transcript": transcript,
-                "points_earned": points_earned,
-                "new_points": new_points,
-                "new_level": new_level,
-                "challenge": dict(challenge)
-            }
-        )
-    except Exception as e:
-        print(f"DEBUG: Error during challenge practice: {str(e)}")
-        import traceback
-        traceback.print_exc()
+            session = sessions.create("practice", "practice", (user_id, target_text))
+    except jobs.QueueFull as e:
+        return jsonify({"error": f"Server busy: {str(e)}"}), 503
+    return jsonify({
+        "session_id": session.id,
+        "chunk_url": f"/stream/{session.id}/chunk",
+        "finish_url": f"/stream/{session.id}/finish",
+    }), 201
+
+
+@bp.route("/stream/<session_id>/chunk", methods=["POST"])
+def stream_chunk(session_id):
+    """Append the next piece of the recording (raw MediaRecorder bytes, in order)."""
+    sessions = current_app.extensions["stream_sessions"]
+    session = sessions.get(session_id)
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    try:
+        session.feed(request.get_data())
+    except audio_io.AudioDecodeError as e:
+        metrics.FFMPEG_FAILURES.inc()
+        sessions.pop(session_id)
+        session.abort()
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
-    finally:
-        print("DEBUG: Cleaning up temporary files.")
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    return jsonify({"received": session.received, "speech_ended": session.speech_ended}), 200
+
+
+@bp.route("/stream/<session_id>/finish", methods=["POST"])
+def stream_finish(session_id):
+    """Score the streamed recording, usually from a transcript that was
+    started as soon as the student stopped speaking."""
+    session = current_app.extensions["stream_sessions"].pop(session_id)
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    score = score_practice if session.kind == "practice" else score_challenge
+    return _submit_or_run(session.kind, score, *session.score_args, None, session.finish)
+
+
+@bp.route("/stream/<session_id>", methods=["DELETE"])
+def stream_cancel(session_id):
+    session = current_app.extensions["stream_sessions"].pop(session_id)
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    session.abort()
+    return jsonify({"status": "ok"}), 200
 
-@app.route("/profile", methods=["GET"])
+
+@bp.route("/profile", methods=["GET"])
 def profile():
-    user_id = request.args.get("user_id")
+    user_id = auth.request_user_id(request.args.get("user_id"))
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
-    
-    db = get_db()
-    cur = db.cursor()
-    
-    # Get total practice sessions
-    cur.execute("SELECT COUNT(*) as total_sessions FROM attempts WHERE user_id = ?", (user_id,))
-    total_sessions = cur.fetchone()["total_sessions"]
-    
-    # Get best score
-    cur.execute("SELECT MAX(accuracy) as best_score FROM attempts WHERE user_id = ?", (user_id,))
-    best_score_row = cur.fetchone()
-    best_score = int(best_score_row["best_score"]) if best_score_row["best_score"] else 0
-    
-    # Calculate streaks (simplified - consecutive days with practice)
-    cur.execute("""
-        SELECT DATE(created_at) as practice_date 
-        FROM attempts 
-        WHERE user_id = ? 
-        GROUP BY DATE(created_at) 
-        ORDER BY practice_date DESC
-    """, (user_id,))
-    practice_dates = cur.fetchall()
-    
-    # Simple streak calculation
-    streak = 0
-    if practice_dates:
-        # For now, just count unique practice days as streak
-        streak = min(len(practice_dates), 30)  # Cap at 30 for demo
-    
-    # Get challenges won by difficulty
-    cur.execute("""
-        SELECT c.difficulty, COUNT(*) as won_count
-        FROM user_challenges uc
-        JOIN challenges c ON uc.challenge_id = c.id
-        WHERE uc.user_id = ? AND uc.accuracy >= 80
-        GROUP BY c.difficulty
-    """, (user_id,))
-    
-    challenges_won = {"easy": 0, "medium": 0, "hard": 0}
-    for row in cur.fetchall():
-        challenges_won[row["difficulty"]] = row["won_count"]
-    
-    profile_data = {
-        "streaks": streak,
-        "totalSessions": total_sessions,
-        "bestScore": best_score,
-        "challengesWon": challenges_won
-    }
-    
+
+    # Single primary-key read of the rollup maintained by record_attempt()
+    profile_data = user_stats.get_profile(get_db(), user_id)
     return jsonify({"profile": profile_data})
 
 if __name__ == "__main__":
     if not os.path.exists(DB_PATH):
         open(DB_PATH, "a").close()
-    with app.app_context():
-        init_db()
-    app.run(debug=True, port=5000)
+    app = create_app(warm=True)
+    # The reloader would spawn a second process and load every model twice.
+    app.run(debug=True, port=5000, use_reloader=False)
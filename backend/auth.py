@@ -0,0 +1,137 @@
+"""Signed session tokens and password hashing.
+
+/login hands out a token signed with SECRET_KEY that carries the user's id
+and level. Routes read the caller from ``Authorization: Bearer <token>``,
+which is checked in memory with no users-table read. A bare ``user_id``
+field is only trusted on its own when ALLOW_LEGACY_USER_ID=1, for old
+clients during a migration.
+
+Every process that serves requests must share the same SECRET_KEY, or
+tokens issued by one will be rejected by the others.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+SECRET_KEY = os.environ.get("SECRET_KEY", "")
+TOKEN_MAX_AGE_SECONDS = int(os.environ.get("TOKEN_MAX_AGE_SECONDS", str(12 * 3600)))
+ALLOW_LEGACY_USER_ID = os.environ.get("ALLOW_LEGACY_USER_ID", "0") == "1"
+# PBKDF2 rounds for new and upgraded hashes; each check costs about this
+# many SHA-256 blocks of CPU that the scoring workers would otherwise get
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "260000"))
+# Recently verified logins, so a class signing in at once pays the hash once each
+LOGIN_CACHE_SIZE = int(os.environ.get("LOGIN_CACHE_SIZE", "1024"))
+LOGIN_CACHE_TTL_SECONDS = int(os.environ.get("LOGIN_CACHE_TTL_SECONDS", "300"))
+# Operator routes (model reload) take this in X-Admin-Token; unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Without SECRET_KEY tokens only verify in the process that issued them
+_serializer = URLSafeTimedSerializer(SECRET_KEY or secrets.token_hex(32), salt="session")
+HASH_METHOD = f"pbkdf2:sha256:{PASSWORD_HASH_ITERATIONS}"
+
+
+class AuthError(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.status = status
+
+
+def issue_token(user):
+    return _serializer.dumps({"uid": user["id"], "level": user["level"]})
+
+
+def verify_token(token):
+    """Claims dict ({"uid", "level"}) for a valid, unexpired token, else None."""
+    try:
+        return _serializer.loads(token, max_age=TOKEN_MAX_AGE_SECONDS)
+    except BadSignature:
+        return None
+
+
+def request_user_id(supplied=None):
+    """The caller's user id.
+
+    A valid bearer token is required and must agree with any `supplied`
+    user_id. The legacy field is used on its own only when
+    ALLOW_LEGACY_USER_ID is set.
+    """
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        claims = verify_token(header[len("Bearer "):].strip())
+        if claims is None:
+            raise AuthError("invalid or expired token")
+        if supplied not in (None, "") and str(supplied) != str(claims["uid"]):
+            raise AuthError("user_id does not match token", 403)
+        g.user = claims
+        return claims["uid"]
+    if ALLOW_LEGACY_USER_ID:
+        return supplied
+    raise AuthError("authorization required")
+
+
+def require_admin():
+    """Reject the request unless it carries the configured ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise AuthError("admin routes are disabled", 404)
+    supplied = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        raise AuthError("admin token required", 403)
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=HASH_METHOD)
+
+
+def needs_rehash(password_hash):
+    # Stored as "<method>$<salt>$<hash>"
+    return password_hash.split("$", 1)[0] != HASH_METHOD
+
+
+class CredentialCache:
+    """Bounded LRU of recently verified (username, password, stored hash).
+
+    Entries are keyed by an HMAC under a per-process key, so neither the
+    password nor a fast hash of it is kept in memory. Including the stored
+    hash means a changed password never matches an old entry.
+    """
+
+    def __init__(self, size=LOGIN_CACHE_SIZE, ttl=LOGIN_CACHE_TTL_SECONDS):
+        self._size = size
+        self._ttl = ttl
+        self._key = secrets.token_bytes(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, username, password, password_hash):
+        message = "\0".join((username, password, password_hash)).encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, username, password, password_hash):
+        """check_password_hash() with recent successes answered from memory."""
+        digest = self._digest(username, password, password_hash)
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(digest)
+            if expires is not None and expires > now:
+                self._entries.move_to_end(digest)
+                return True
+        if not check_password_hash(password_hash, password):
+            return False
+        if self._size > 0:
+            with self._lock:
+                self._entries[digest] = now + self._ttl
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+        return True
+
+
+credentials = CredentialCache()
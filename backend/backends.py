@@ -0,0 +1,143 @@
+"""Transcription backends: how a Whisper model is loaded and run.
+
+TRANSCRIBE_BACKEND picks one per process:
+
+- ``torch`` (default): openai-whisper in fp32, batched through whisper.decode()
+- ``torch-int8``: the same model with its Linear layers dynamically quantized
+  to int8, which is smaller and usually faster on CPU
+- ``ctranslate2``: faster-whisper (CTranslate2), when it is installed
+
+Check accuracy drift against ``torch`` with benchmarks.backend_drift before
+switching a deployment.
+"""
+import os
+import threading
+
+TRANSCRIBE_BACKEND = os.environ.get("TRANSCRIBE_BACKEND", "torch")
+# torch intra-op threads for this process; 0 leaves torch's default
+TORCH_NUM_THREADS = int(os.environ.get("TORCH_NUM_THREADS", "0"))
+# faster-whisper weight type: int8, int8_float32, float32, ...
+CT2_COMPUTE_TYPE = os.environ.get("CT2_COMPUTE_TYPE", "int8")
+
+# Whisper's decoder works on fixed 30 second windows (whisper.audio.N_SAMPLES);
+# anything longer has to go through transcribe() and its sliding window
+# instead of a padded batch.
+MAX_BATCH_SAMPLES = 30 * 16000
+
+_num_threads = 0
+_threads_lock = threading.Lock()
+
+
+def configure_threads(threads=None):
+    """Apply TORCH_NUM_THREADS (or `threads`) once, before the first model loads."""
+    global _num_threads
+    threads = threads or TORCH_NUM_THREADS
+    with _threads_lock:
+        if _num_threads or not threads:
+            return
+        import torch
+
+        torch.set_num_threads(threads)
+        _num_threads = threads
+
+
+def _transcribe_options(options):
+    # transcribe() takes the prompt as initial_prompt and sets `prompt` itself
+    options = dict(options)
+    if "prompt" in options:
+        options["initial_prompt"] = options.pop("prompt")
+    return options
+
+
+class TorchBackend:
+    name = "torch"
+
+    def load(self, model_name):
+        # Imported here so that importing the app doesn't pull in torch
+        import whisper
+
+        configure_threads()
+        return whisper.load_model(model_name)
+
+    def transcribe(self, model, samples, options):
+        return model.transcribe(samples, fp16=False, **_transcribe_options(options)).get("text", "")
+
+    def decode(self, model, clips, options):
+        """Transcribe several clips with one padded decode() call; returns texts."""
+        import torch
+        import whisper
+
+        short = [i for i, samples in enumerate(clips) if len(samples) <= MAX_BATCH_SAMPLES]
+        texts = [None] * len(clips)
+
+        if short:
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(clips[i])), model.dims.n_mels
+                )
+                for i in short
+            ]).to(model.device)
+            results = whisper.decode(model, mels, whisper.DecodingOptions(fp16=False, **options))
+            for i, result in zip(short, results):
+                texts[i] = result.text
+
+        for i, samples in enumerate(clips):
+            if texts[i] is None:
+                texts[i] = self.transcribe(model, samples, options)
+        return texts
+
+
+class QuantizedTorchBackend(TorchBackend):
+    name = "torch-int8"
+
+    def load(self, model_name):
+        import torch
+
+        model = super().load(model_name)
+        # whisper.model.Linear only adds a dtype cast in forward(); make those
+        # layers plain nn.Linear so quantize_dynamic recognises and swaps them
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class CTranslate2Backend:
+    name = "ctranslate2"
+
+    def load(self, model_name):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError(
+                "TRANSCRIBE_BACKEND=ctranslate2 needs faster-whisper: pip install faster-whisper"
+            )
+        # Same thread budget as the torch backends (a worker's pinned count)
+        return WhisperModel(
+            model_name, device="cpu", compute_type=CT2_COMPUTE_TYPE, cpu_threads=_num_threads or TORCH_NUM_THREADS
+        )
+
+    def transcribe(self, model, samples, options):
+        options = _transcribe_options(options)
+        if "sample_len" in options:
+            options["max_new_tokens"] = options.pop("sample_len")
+        segments, _ = model.transcribe(samples, **options)
+        return "".join(segment.text for segment in segments)
+
+    def decode(self, model, clips, options):
+        # No padded batch API; CTranslate2 parallelises inside each call
+        return [self.transcribe(model, samples, options) for samples in clips]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend(), QuantizedTorchBackend(), CTranslate2Backend())
+}
+
+
+def get_backend(name=None):
+    name = name or TRANSCRIBE_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown transcription backend '{name}'; choose from {sorted(BACKENDS)}")
@@ -0,0 +1,112 @@
+"""Compare transcription backends against the fp32 torch reference.
+
+Usage (from backend/):
+
+    python -m benchmarks.backend_drift --corpus path/to/clips
+        [--model base] [--backends torch-int8,ctranslate2] [--fast-path] [--json out.json]
+
+The corpus uses the same layout as benchmarks.fast_path. Every clip is
+transcribed once by ``torch`` and once by each candidate backend. For each
+candidate the report gives:
+
+- load time and latency,
+- how often its transcript matches the reference exactly,
+- mean phoneme accuracy against the target word,
+- how far those accuracy scores move from the reference (mean and max),
+  which is what a student would see.
+
+A backend that cannot be loaded, for example because faster-whisper is
+not installed, is reported with its error and skipped.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import backends
+import inference
+import model_registry
+import phonemes
+import scoring
+from benchmarks.fast_path import load_corpus
+
+
+def run_backend(name, model_name, clips, options_for):
+    backend = backends.get_backend(name)
+    start = time.perf_counter()
+    model = backend.load(model_name)
+    load_ms = (time.perf_counter() - start) * 1000
+    # Untimed pass so lazy initialisation doesn't land in the first sample
+    backend.transcribe(model, clips[0][2], options_for(clips[0][1]))
+
+    rows = []
+    for clip, word, samples in clips:
+        start = time.perf_counter()
+        text = backend.transcribe(model, samples, options_for(word)).strip()
+        latency = time.perf_counter() - start
+        accuracy = scoring.score(phonemes.phonemes(word), phonemes.phonemes(text)).accuracy
+        rows.append({"clip": clip, "text": text, "accuracy": accuracy, "latency": latency})
+    return load_ms, rows
+
+
+def summarize(load_ms, rows, reference=None):
+    latencies = sorted(r["latency"] for r in rows)
+    summary = {
+        "load_ms": round(load_ms, 1),
+        "latency_ms_mean": round(statistics.mean(latencies) * 1000, 2),
+        "latency_ms_p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2),
+        "accuracy_mean": round(statistics.mean(r["accuracy"] for r in rows), 2),
+    }
+    if reference is not None:
+        deltas = [abs(r["accuracy"] - ref["accuracy"]) for r, ref in zip(rows, reference)]
+        same = [phonemes.normalize(r["text"]) == phonemes.normalize(ref["text"]) for r, ref in zip(rows, reference)]
+        summary.update({
+            "transcript_agreement": round(sum(same) / len(rows), 3),
+            "accuracy_delta_mean": round(statistics.mean(deltas), 2),
+            "accuracy_delta_max": round(max(deltas), 2),
+            "disagreements": [
+                {"clip": r["clip"], "reference": ref["text"], "text": r["text"]}
+                for r, ref, ok in zip(rows, reference, same)
+                if not ok
+            ][:20],
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="directory of recorded clips")
+    parser.add_argument("--model", default=model_registry.DEFAULT_MODEL)
+    parser.add_argument("--backends", default="torch-int8,ctranslate2", help="comma separated candidates")
+    parser.add_argument("--fast-path", action="store_true", help="decode with the challenge fast-path options")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    clips = load_corpus(args.corpus)
+    if not clips:
+        parser.error(f"no audio clips found in {args.corpus}")
+    options_for = inference.fast_path_options if args.fast_path else (lambda word: {})
+
+    ref_load_ms, reference = run_backend("torch", args.model, clips, options_for)
+    results = {
+        "model": args.model,
+        "clips": len(clips),
+        "fast_path": args.fast_path,
+        "torch": summarize(ref_load_ms, reference),
+    }
+    for name in [n.strip() for n in args.backends.split(",") if n.strip() not in ("", "torch")]:
+        try:
+            load_ms, rows = run_backend(name, args.model, clips, options_for)
+        except (ImportError, RuntimeError, ValueError) as e:
+            results[name] = {"error": str(e)}
+            continue
+        results[name] = summarize(load_ms, rows, reference)
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the default challenge decoder with the constrained fast path.
+
+Usage (from backend/):
+
+    python -m benchmarks.fast_path --corpus path/to/clips [--model base] [--repeat 3]
+
+The corpus is a directory of recordings. Each clip's expected word comes
+from an optional ``manifest.json`` ({"file.webm": "word"}), or else from the
+file name up to the first "_" (``water_02.webm`` -> "water"). Every clip is
+decoded once up front, so only transcription time is measured.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import audio as audio_io
+import inference
+import model_registry
+import phonemes
+import scoring
+
+AUDIO_EXTENSIONS = (".webm", ".wav", ".ogg", ".mp3", ".m4a", ".flac")
+
+
+def load_corpus(path):
+    manifest_path = os.path.join(path, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    clips = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(AUDIO_EXTENSIONS):
+            continue
+        word = manifest.get(name) or os.path.splitext(name)[0].split("_")[0]
+        with open(os.path.join(path, name), "rb") as f:
+            clips.append((name, word, audio_io.decode_audio(f.read())))
+    return clips
+
+
+def run_mode(model, clips, options_for, repeat):
+    latencies, accuracies, exact = [], [], 0
+    for _, word, samples in clips:
+        options = options_for(word)
+        text = ""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = inference.decode_clips(model, [samples], options)[0].strip()
+            latencies.append(time.perf_counter() - start)
+        accuracy = scoring.score(phonemes.phonemes(word), phonemes.phonemes(text)).accuracy
+        accuracies.append(accuracy)
+        exact += phonemes.normalize(text).strip(".!?,") == phonemes.normalize(word)
+    return {
+        "latency_ms_mean": round(statistics.mean(latencies) * 1000, 2),
+        "latency_ms_p95": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000, 2),
+        "accuracy_mean": round(statistics.mean(accuracies), 2),
+        "exact_match_rate": round(exact / len(clips), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="directory of recorded clips")
+    parser.add_argument("--model", default=model_registry.model_name_for("challenge"))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per clip")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    clips = load_corpus(args.corpus)
+    if not clips:
+        parser.error(f"no audio clips found in {args.corpus}")
+    model = model_registry.get_model(args.model)
+    # One untimed pass so lazy initialisation doesn't land in the first sample
+    inference.decode_clips(model, [clips[0][2]], {})
+
+    results = {
+        "model": args.model,
+        "clips": len(clips),
+        "default": run_mode(model, clips, lambda word: {}, args.repeat),
+        "fast_path": run_mode(model, clips, inference.fast_path_options, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""End-to-end benchmark of the scoring routes through the Flask test client.
+
+Usage (from backend/):
+
+    python -m benchmarks.pipeline [--route practice] [--concurrency 1,2,4,8]
+        [--requests 40] [--model stand-in] [--corpus DIR] [--json out.json]
+
+By default the corpus is a set of synthetic WAV fixtures generated on the
+fly (tones, amplitude-modulated "syllables", noise, silence), so the run
+needs no recordings and no network. ``--corpus`` points at recorded clips
+instead, using the same layout as benchmarks.fast_path. ``--model stand-in``
+replaces Whisper with a model that burns a fixed amount of CPU per second of
+audio and returns the target word. Pass a real model size to measure Whisper
+itself.
+
+Every run uses a fresh temporary database and disables the result cache
+unless ``--cache`` is given. Scoring runs in-process so that the per-stage
+spans (see timing.py) are visible here.
+
+The JSON report has:
+
+- the cold first request,
+- per-stage timings,
+- requests/s and latency at each concurrency level,
+- peak RSS of this process and of its ffmpeg children.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+STAND_IN_TEXT = "hello"
+AUDIO_EXTENSIONS = (".webm", ".wav", ".ogg", ".mp3", ".m4a", ".flac")
+
+
+def _wav_bytes(samples):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def synthetic_corpus():
+    """Deterministic fixtures: (name, target text, wav bytes, expected status)."""
+    rng = np.random.default_rng(0)
+
+    def t(seconds):
+        return np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+
+    def syllables(seconds, rate=4.0):
+        # 220 Hz carrier switched on and off a few times per second, like speech
+        x = t(seconds)
+        return 0.4 * np.sin(2 * np.pi * 220 * x) * (np.sin(2 * np.pi * rate * x) > 0)
+
+    quiet = np.zeros(int(0.4 * SAMPLE_RATE))
+    fixtures = [
+        ("tone_1s", STAND_IN_TEXT, 0.3 * np.sin(2 * np.pi * 440 * t(1.0)), 200),
+        ("tone_3s", STAND_IN_TEXT, 0.3 * np.sin(2 * np.pi * 440 * t(3.0)), 200),
+        ("syllables_2s", STAND_IN_TEXT, np.concatenate([quiet, syllables(2.0), quiet]), 200),
+        ("syllables_noisy_2s", STAND_IN_TEXT,
+         np.concatenate([quiet, syllables(2.0), quiet]) + 0.01 * rng.standard_normal(int(2.8 * SAMPLE_RATE)), 200),
+        ("silence_2s", STAND_IN_TEXT, np.zeros(int(2.0 * SAMPLE_RATE)), 500),
+    ]
+    return [(name, text, _wav_bytes(samples), status) for name, text, samples, status in fixtures]
+
+
+def recorded_corpus(path):
+    # Same conventions as benchmarks.fast_path: manifest.json or "word_NN.ext"
+    manifest_path = os.path.join(path, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    clips = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(AUDIO_EXTENSIONS):
+            continue
+        word = manifest.get(name) or os.path.splitext(name)[0].split("_")[0]
+        with open(os.path.join(path, name), "rb") as f:
+            clips.append((name, word, f.read(), 200))
+    return clips
+
+
+class StandInModel:
+    """Whisper-shaped stand-in: fixed CPU work per second of audio."""
+
+    def __init__(self, ms_per_second=50):
+        self.ms_per_second = ms_per_second
+
+    def transcribe(self, audio, **options):
+        deadline = time.perf_counter() + len(audio) / SAMPLE_RATE * self.ms_per_second / 1000
+        frame = np.asarray(audio[:4096], dtype=np.float32)
+        while time.perf_counter() < deadline:
+            np.fft.rfft(frame)
+        return {"text": " " + (options.get("initial_prompt") or STAND_IN_TEXT)}
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2) if values else 0.0
+
+
+def _post(client, route, headers, challenge_id, clip):
+    name, text, data, _ = clip
+    form = {"audio": (io.BytesIO(data), name + ".wav")}
+    if route == "challenge":
+        form["challenge_id"] = str(challenge_id)
+        return client.post("/challenge/practice", data=form, headers=headers)
+    form["target_text"] = text
+    return client.post("/practice", data=form, headers=headers)
+
+
+def run_level(flask_app, route, headers, challenge_id, clips, concurrency, requests):
+    latencies = []
+    statuses = {}
+    unexpected = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = flask_app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            clip = clips[i % len(clips)]
+            start = time.perf_counter()
+            response = _post(client, route, headers, challenge_id, clip)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code != clip[3]:
+                    unexpected.append({"clip": clip[0], "status": response.status_code})
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(requests / wall, 2),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "max": _percentile(latencies, 1.0),
+        },
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "unexpected": unexpected[:10],
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--route", choices=("practice", "challenge"), default="practice")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma separated thread counts")
+    parser.add_argument("--requests", type=int, default=40, help="requests per concurrency level")
+    parser.add_argument("--model", default="stand-in", help="'stand-in' or a Whisper model size")
+    parser.add_argument("--stand-in-ms", type=int, default=50, help="stand-in CPU ms per second of audio")
+    parser.add_argument("--corpus", help="directory of recorded clips instead of synthetic fixtures")
+    parser.add_argument("--cache", action="store_true", help="keep the transcription result cache enabled")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.concurrency.split(",") if n.strip()]
+
+    # Keep stdout for the JSON report, whatever the app prints along the way
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(parser, args, levels)
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def run(parser, args, levels):
+
+    # The database path is read at import time, so point it somewhere
+    # disposable before any app module is loaded
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    os.environ["PRONUNCIATION_DB"] = os.path.join(workdir, "bench.db")
+
+    import app as app_module
+    import audio as audio_io
+    import auth
+    import inference
+    import model_registry
+    import result_cache
+    import timing
+    import workers
+
+    if not audio_io.ffmpeg_available():
+        parser.error("ffmpeg is required")
+    # Stage spans are only visible in-process
+    workers.SCORING_WORKERS = 0
+    if not args.cache:
+        result_cache.cache = result_cache.ResultCache(max_entries=0, disk=False)
+    if args.model == "stand-in":
+        for name in set(model_registry.ROUTE_MODELS.values()):
+            model_registry.register(name, StandInModel(args.stand_in_ms))
+        # Batched decode needs the real model's mel front end
+        inference.BATCHING_ENABLED = False
+    else:
+        model_registry.ROUTE_MODELS.update(practice=args.model, challenge=args.model)
+
+    clips = recorded_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not clips:
+        parser.error(f"no audio clips found in {args.corpus}")
+
+    flask_app = app_module.create_app(warm=False)
+    with flask_app.app_context():
+        app_module.init_db()
+        db = app_module.get_db()
+        cur = db.execute(
+            "INSERT INTO users (username, password_hash, created_at) VALUES ('bench', '', datetime('now'))"
+        )
+        db.commit()
+        # Scoring routes take the caller from a session token, as after /login
+        headers = {"Authorization": "Bearer " + auth.issue_token({"id": cur.lastrowid, "level": 1})}
+        challenge_id = db.execute("SELECT id FROM challenges ORDER BY id LIMIT 1").fetchone()[0]
+
+    stages = timing.StageTimes()
+    timing.add_sink(stages)
+    client = flask_app.test_client()
+    start = time.perf_counter()
+    response = _post(client, args.route, headers, challenge_id, clips[0])
+    cold = {
+        "status": response.status_code,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "stages": stages.summary(),
+    }
+    stages.reset()
+
+    results = {
+        "route": args.route,
+        "model": args.model,
+        "corpus": args.corpus or "synthetic",
+        "clips": [name for name, _, _, _ in clips],
+        "result_cache": args.cache,
+        "cold_request": cold,
+        "levels": [
+            run_level(flask_app, args.route, headers, challenge_id, clips, n, args.requests) for n in levels
+        ],
+        "stages": stages.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    timing.remove_sink(stages)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure worker cold start: importing app and building it with create_app().
+
+Usage (from backend/):
+
+    python -m benchmarks.startup [--runs 5] [--warm] [--json out.json]
+
+Each run is a fresh interpreter. The report includes import and factory
+time, which heavy ML modules ended up loaded (expected: none without
+--warm) and the slowest imports according to ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("torch", "whisper", "g2p_en", "nltk")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app(warm={warm})
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _slowest_imports(stderr, top):
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+        entries.append((int(cumulative_us), name.strip()))
+    entries.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 2)} for us, name in entries[:top]]
+
+
+def run_once(warm):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(warm=warm, heavy=HEAVY_MODULES)],
+        cwd=backend,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["slowest_imports"] = _slowest_imports(proc.stderr, 10)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm", action="store_true", help="include the warm-up phase (models, G2P)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    runs = [run_once(args.warm) for _ in range(args.runs)]
+    total = [r["import_ms"] + r["create_app_ms"] for r in runs]
+    results = {
+        "runs": args.runs,
+        "warm": args.warm,
+        "import_ms_median": round(statistics.median(r["import_ms"] for r in runs), 2),
+        "create_app_ms_median": round(statistics.median(r["create_app_ms"] for r in runs), 2),
+        "total_ms_median": round(statistics.median(total), 2),
+        "total_ms_max": round(max(total), 2),
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "slowest_imports": runs[-1]["slowest_imports"],
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
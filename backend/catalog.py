@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import phonemes
+
+LIST_FIELDS = ("id", "word", "difficulty", "points", "description")
+# Each worker process keeps its own snapshot, so challenge edits made through
+# another process show up after at most this long.
+REFRESH_SECONDS = int(os.environ.get("CATALOG_REFRESH_SECONDS", "60"))
+
+
+class Snapshot:
+    """One immutable load of the challenges table."""
+
+    def __init__(self, rows):
+        self.by_id = {row["id"]: row for row in rows}
+        self._by_difficulty = {}
+        for row in rows:
+            self._by_difficulty.setdefault(row["difficulty"], []).append({f: row[f] for f in LIST_FIELDS})
+        # Inverted index for recommendations: base phoneme (stress dropped) ->
+        # [(share of the word's phonemes, challenge id)], densest first
+        self.postings = {}
+        for row in rows:
+            tokens = [t.rstrip("012") for t in phonemes.from_column(row.get("phonemes")) if t[0].isalpha()]
+            for phoneme, count in Counter(tokens).items():
+                self.postings.setdefault(phoneme, []).append((count / len(tokens), row["id"]))
+        for entries in self.postings.values():
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        # A content hash, so every worker that loads the same catalog hands
+        # out the same validator
+        self.etag = hashlib.sha1(json.dumps(rows, sort_keys=True).encode()).hexdigest()[:16]
+
+    def get(self, challenge_id):
+        """Full challenge row (including phonemes) as a dict, or None."""
+        return self.by_id.get(challenge_id)
+
+    def by_difficulty(self, difficulty):
+        return self._by_difficulty.get(difficulty, [])
+
+
+class ChallengeCatalog:
+    """In-memory copy of the challenges table, reloaded after invalidate()
+    or once it is REFRESH_SECONDS old."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+
+    def load(self, db):
+        rows = [dict(row) for row in db.execute("SELECT * FROM challenges ORDER BY word, id")]
+        snapshot = Snapshot(rows)
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.time()
+        return snapshot
+
+    def current(self, db):
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - self._loaded_at >= REFRESH_SECONDS:
+            return self.load(db)
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+
+catalog = ChallengeCatalog()
@@ -0,0 +1,278 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+DB_PATH = os.environ.get(
+    "PRONUNCIATION_DB", os.path.join(os.path.dirname(__file__), "pronunciation.db")
+)
+BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+# Statements prepared per connection; pooled connections outlive the
+# requests that use them, so hot queries are compiled once per connection.
+STATEMENT_CACHE = int(os.environ.get("DB_STATEMENT_CACHE", "256"))
+LOCK_RETRIES = int(os.environ.get("DB_LOCK_RETRIES", "5"))
+# Idle connections kept open for reuse. Requests never wait for one: when
+# none is idle a new connection is opened, and it is closed on release if
+# the pool is already full.
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "16"))
+# Batch attempt writes from many requests into one transaction/fsync
+GROUP_COMMIT = os.environ.get("DB_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get("DB_GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX = int(os.environ.get("DB_GROUP_COMMIT_MAX", "64"))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # WAL + NORMAL only fsyncs at checkpoints; committed data survives an
+    # application crash, the last transactions may be lost on power failure.
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_local = threading.local()
+
+
+def connect(path=None):
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Reusable tuned connections to one database, shared across threads.
+
+    Servers that start a thread per request would otherwise reconnect and
+    re-run every PRAGMA on each request. A scoring request holds its
+    connection through transcription, so checkouts are never capped; only
+    the number of idle connections kept is. Idle ones are handed out
+    most-recently-used first, so their statement caches stay warm.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return connect(self.path)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    path = path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def get_connection(path=None):
+    """Check out a pooled connection; pair every call with release().
+
+    A thread that already holds one gets the same connection back, so a
+    request and the write() it makes share one connection and transaction
+    scope rather than opening two.
+    """
+    pool = get_pool(path)
+    held = getattr(_local, "held", None)
+    if held is None:
+        held = _local.held = {}
+    entry = held.get(pool.path)
+    if entry is None:
+        entry = held[pool.path] = [pool.acquire(), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+def release(conn):
+    """Give back a get_connection(); the last release returns it to the pool."""
+    held = getattr(_local, "held", {})
+    for path, entry in held.items():
+        if entry[0] is conn:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del held[path]
+                get_pool(path).release(conn)
+            return
+
+
+def close_all():
+    """Close every idle pooled connection."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+def _is_locked(error):
+    return "locked" in str(error) or "busy" in str(error)
+
+
+def with_retry(fn, *args):
+    """Call fn(*args), retrying with backoff if SQLite still reports a lock
+    after busy_timeout. fn must leave no partial transaction on failure."""
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e) or attempt == LOCK_RETRIES:
+                raise
+            metrics.DB_LOCK_RETRIES.inc()
+            time.sleep(0.05 * (2 ** attempt))
+
+
+def award_points(cur, user_id, points_earned):
+    """Add points and recompute level in one statement; returns (points, level)."""
+    if HAS_RETURNING:
+        row = cur.execute(
+            "UPDATE users SET points = points + ?, level = 1 + (points + ?) / 100 WHERE id = ? RETURNING points, level",
+            (points_earned, points_earned, user_id),
+        ).fetchone()
+        return row[0], row[1]
+    cur.execute(
+        "UPDATE users SET points = points + ?, level = 1 + (points + ?) / 100 WHERE id = ?",
+        (points_earned, points_earned, user_id),
+    )
+    row = cur.execute("SELECT points, level FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row[0], row[1]
+
+
+class GroupCommitWriter:
+    """Single writer thread that runs queued write functions in shared transactions.
+
+    Each submitted ``fn(conn)`` runs inside its own savepoint, so one failing
+    write is rolled back alone; the batch then commits once and every caller
+    gets its result after that commit.
+    """
+
+    def __init__(self, path=None, window_ms=GROUP_COMMIT_WINDOW_MS, max_batch=GROUP_COMMIT_MAX):
+        self.path = path or DB_PATH
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # isolation_level=None: transactions and savepoints are managed here
+        conn = connect(self.path)
+        conn.isolation_level = None
+        while True:
+            batch = self._collect()
+            outcomes = []
+            try:
+                with_retry(conn.execute, "BEGIN IMMEDIATE")
+                for fn, args, future in batch:
+                    conn.execute("SAVEPOINT item")
+                    try:
+                        outcomes.append((future, fn(conn, *args), None))
+                        conn.execute("RELEASE item")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO item")
+                        conn.execute("RELEASE item")
+                        outcomes.append((future, None, e))
+                with_retry(conn.execute, "COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GroupCommitWriter()
+        return _writer
+
+
+def write(fn, *args):
+    """Run ``fn(conn, *args)`` in a committed transaction and return its result.
+
+    Goes through the group-commit writer when DB_GROUP_COMMIT=1, otherwise
+    runs on a pooled connection (this thread's, if it holds one), retrying
+    the whole transaction if the database stays locked.
+    """
+    if GROUP_COMMIT:
+        return _get_writer().submit(fn, *args).result()
+
+    conn = get_connection()
+
+    def attempt():
+        try:
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+    try:
+        return with_retry(attempt)
+    finally:
+        release(conn)
@@ -0,0 +1,69 @@
+import base64
+import json
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+EXPORT_FETCH_SIZE = 500
+
+COLUMNS = "id, target_text, transcript, accuracy, points_earned, created_at, challenge_id"
+
+
+def encode_cursor(created_at, attempt_id):
+    raw = json.dumps([created_at, attempt_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, attempt_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), int(attempt_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+def _where(user_id, before=None, challenge_id=None, date_from=None, date_to=None):
+    clauses = ["user_id = ?"]
+    params = [user_id]
+    if challenge_id is not None:
+        clauses.append("challenge_id = ?")
+        params.append(challenge_id)
+    if date_from:
+        clauses.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        # Inclusive of the whole `date_to` day
+        clauses.append("created_at < DATE(?, '+1 day')")
+        params.append(date_to)
+    if before is not None:
+        clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params.extend([before[0], before[0], before[1]])
+    return " AND ".join(clauses), params
+
+
+def page(db, user_id, limit=DEFAULT_LIMIT, **filters):
+    """Newest-first attempts; returns (rows, cursor for the next page or None)."""
+    where, params = _where(user_id, **filters)
+    rows = db.execute(
+        f"SELECT {COLUMNS} FROM attempts WHERE {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return items, next_cursor
+
+
+def export_ndjson(db, user_id, **filters):
+    """Yield every matching attempt as one JSON line, reading in small batches."""
+    where, params = _where(user_id, **filters)
+    cur = db.execute(
+        f"SELECT {COLUMNS} FROM attempts WHERE {where} ORDER BY created_at DESC, id DESC", params
+    )
+    while True:
+        rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            break
+        yield "".join(json.dumps(dict(row)) + "\n" for row in rows)
@@ -0,0 +1,169 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import backends
+import model_registry
+
+BATCHING_ENABLED = os.environ.get("INFERENCE_BATCHING", "1") != "0"
+BATCH_WINDOW_MS = float(os.environ.get("INFERENCE_BATCH_WINDOW_MS", "25"))
+MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH", "8"))
+
+# Challenge difficulties scored with the constrained single-word decoder, e.g.
+# "easy,medium". Off by default: validate it against recorded clips first
+# (python -m benchmarks.fast_path)
+FAST_PATH_DIFFICULTIES = {
+    d.strip() for d in os.environ.get("FAST_PATH_DIFFICULTIES", "").split(",") if d.strip()
+}
+FAST_PATH_MAX_TOKENS = int(os.environ.get("FAST_PATH_MAX_TOKENS", "12"))
+
+
+class _Pending:
+    __slots__ = ("samples", "options", "future", "submitted")
+
+    def __init__(self, samples, options):
+        self.samples = samples
+        self.options = options
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class InferenceQueue:
+    """Collects clips for one model and runs them through it as padded batches.
+
+    Requests block in ``transcribe()`` while a background thread gathers
+    everything that arrives within ``window_ms`` of the first pending clip (up
+    to ``max_batch`` clips), decodes them together and hands each text back to
+    its caller.
+    """
+
+    def __init__(self, model_name, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.model_name = model_name
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._waits = deque(maxlen=1000)
+        self._served = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"inference-{model_name}", daemon=True
+        )
+        self._thread.start()
+
+    def transcribe(self, samples, **options):
+        """Queue `samples` (16 kHz float32) and wait for the transcript text."""
+        pending = _Pending(samples, options)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            histogram = dict(sorted(self._batch_sizes.items()))
+            served = self._served
+
+        def pct(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2) if waits else 0.0
+
+        return {
+            "model": self.model_name,
+            "depth": self.depth(),
+            "served": served,
+            "batch_sizes": histogram,
+            "wait_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            with self._stats_lock:
+                self._batch_sizes[len(batch)] += 1
+                self._served += len(batch)
+                self._waits.extend(started - p.submitted for p in batch)
+
+            # Only clips with identical decoding options can share a decode() call
+            groups = {}
+            for pending in batch:
+                key = tuple(sorted(pending.options.items()))
+                groups.setdefault(key, []).append(pending)
+            for group in groups.values():
+                try:
+                    texts = self._decode(group)
+                except Exception as e:
+                    for pending in group:
+                        pending.future.set_exception(e)
+                    continue
+                for pending, text in zip(group, texts):
+                    pending.future.set_result(text)
+
+    def _decode(self, group):
+        model = model_registry.get_model(self.model_name)
+        with model_registry.inference_lock(self.model_name):
+            return decode_clips(model, [p.samples for p in group], group[0].options)
+
+
+def decode_clips(model, clips, options, backend=None):
+    """Transcribe several clips together with the configured backend; returns texts."""
+    return backends.get_backend(backend).decode(model, clips, options)
+
+
+def fast_path_options(word):
+    """Decoding options for a short, known target: English only, greedy,
+    prompted with the word itself and capped to a handful of tokens."""
+    return {
+        "language": "en",
+        "temperature": 0.0,
+        "prompt": word,
+        "sample_len": FAST_PATH_MAX_TOKENS,
+        "without_timestamps": True,
+    }
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(model_name):
+    with _queues_lock:
+        q = _queues.get(model_name)
+        if q is None:
+            q = _queues[model_name] = InferenceQueue(model_name)
+        return q
+
+
+def transcribe(samples, route, **options):
+    """Transcribe through the shared batching queue for `route`'s model."""
+    name = model_registry.model_name_for(route)
+    if not BATCHING_ENABLED:
+        model = model_registry.get_model(name)
+        # No queue thread to serialize callers; take turns on the shared model
+        with model_registry.inference_lock(name):
+            return backends.get_backend().transcribe(model, samples, options)
+    return get_queue(name).transcribe(samples, **options)
+
+
+def stats():
+    with _queues_lock:
+        queues = list(_queues.values())
+    return [q.stats() for q in queues]
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.environ.get("SCORING_JOB_WORKERS", "4"))
+# Submissions beyond this many unfinished jobs are rejected instead of queued
+MAX_PENDING_JOBS = int(os.environ.get("SCORING_MAX_PENDING_JOBS", "64"))
+JOB_TTL_SECONDS = int(os.environ.get("SCORING_JOB_TTL_SECONDS", "600"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.result = None
+        self.status_code = None
+        self.created = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        data = {"job_id": self.id, "kind": self.kind, "status": self.status}
+        if self.done:
+            data["status_code"] = self.status_code
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """Runs scoring work on a bounded thread pool and keeps results for polling.
+
+    `app_context` is called around every job so the work can use get_db()
+    exactly like a request handler does.
+    """
+
+    def __init__(self, app_context, workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS, ttl=JOB_TTL_SECONDS):
+        self._app_context = app_context
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring-job")
+        self._max_pending = max_pending
+        self._ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args):
+        """Queue ``fn(*args)``, which must return ``(payload, status_code)``."""
+        job = Job(kind)
+        with self._lock:
+            self._expire()
+            pending = self._pending()
+            if pending >= self._max_pending:
+                raise QueueFull(f"{pending} scoring jobs already pending")
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def pending(self):
+        with self._lock:
+            return self._pending()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        try:
+            with self._app_context():
+                payload, status_code = fn(*args)
+        except Exception as e:
+            payload, status_code = {"error": f"Processing failed: {str(e)}"}, 500
+        job.result = payload
+        job.status_code = status_code
+        job.status = "done" if status_code < 400 else "failed"
+        job.finished = time.time()
+        job._done.set()
+
+    def _pending(self):
+        return sum(1 for j in self._jobs.values() if not j.done)
+
+    def _expire(self):
+        cutoff = time.time() - self._ttl
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished < cutoff]:
+            del self._jobs[job_id]
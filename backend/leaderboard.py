@@ -0,0 +1,162 @@
+import base64
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+import db as db_layer
+
+# Each worker process keeps its own boards, so points awarded by other
+# workers only show up after the next reload from the users/weekly_points
+# tables.
+REFRESH_SECONDS = int(os.environ.get("LEADERBOARD_REFRESH_SECONDS", "60"))
+MAX_PAGE_SIZE = 100
+
+
+def week_key(when=None):
+    year, week, _ = (when or datetime.utcnow()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def encode_cursor(points, user_id):
+    return base64.urlsafe_b64encode(f"{points}:{user_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        points, user_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return int(points), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+
+class RankedBoard:
+    """Users ordered by points (desc, ties by id) in a sorted key list.
+
+    Rank lookups and page starts are bisections; a point change moves one key.
+    """
+
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self._points = {}
+        self._keys = []
+        self.loaded_at = time.time()
+        self.reset(rows)
+
+    def reset(self, rows):
+        with self._lock:
+            self._points = {user_id: points for user_id, points in rows}
+            self._keys = sorted((-points, user_id) for user_id, points in self._points.items())
+            self.loaded_at = time.time()
+
+    def set(self, user_id, points):
+        with self._lock:
+            self._set(user_id, points)
+
+    def _set(self, user_id, points):
+        old = self._points.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        self._points[user_id] = points
+        insort(self._keys, (-points, user_id))
+
+    def rank(self, user_id):
+        """1-based competition rank (tied users share a rank), or None."""
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return bisect_left(self._keys, (-points,)) + 1, points
+
+    def page(self, cursor=None, limit=20):
+        """Entries after `cursor` as (rank, user_id, points), plus the next cursor."""
+        with self._lock:
+            start = 0
+            if cursor is not None:
+                points, user_id = cursor
+                start = bisect_right(self._keys, (-points, user_id))
+            keys = self._keys[start : start + limit]
+            entries = [(bisect_left(self._keys, (neg,)) + 1, uid, -neg) for neg, uid in keys]
+            more = start + limit < len(self._keys)
+        next_cursor = encode_cursor(entries[-1][2], entries[-1][1]) if entries and more else None
+        return entries, next_cursor
+
+    def __len__(self):
+        return len(self._keys)
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def _load(db, window):
+    if window == "all":
+        rows = db.execute("SELECT id, points FROM users").fetchall()
+    else:
+        rows = db.execute("SELECT user_id, points FROM weekly_points WHERE week = ?", (window,)).fetchall()
+    return [(r[0], r[1] or 0) for r in rows]
+
+
+def get_board(db, window="all"):
+    """The in-process board for "all" time or a week key like "2026-W42"."""
+    with _boards_lock:
+        board = _boards.get(window)
+        if board is not None and time.time() - board.loaded_at < REFRESH_SECONDS:
+            return board
+    rows = _load(db, window)
+    with _boards_lock:
+        board = _boards.get(window)
+        if board is None:
+            board = _boards[window] = RankedBoard(rows)
+        else:
+            board.reset(rows)
+        # Only the current week is kept once its week is over
+        current = week_key()
+        for key in [k for k in _boards if k not in ("all", current, window)]:
+            del _boards[key]
+        return board
+
+
+def record_weekly(cur, user_id, points_earned, week=None):
+    """Add points to the weekly rollup; call inside the attempt's transaction.
+
+    Returns ``(week, points)`` with the user's new weekly total.
+    """
+    week = week or week_key()
+    sql = (
+        "INSERT INTO weekly_points (week, user_id, points) VALUES (?, ?, ?) "
+        "ON CONFLICT(week, user_id) DO UPDATE SET points = points + excluded.points"
+    )
+    if db_layer.HAS_RETURNING:
+        return week, cur.execute(sql + " RETURNING points", (week, user_id, points_earned)).fetchone()[0]
+    cur.execute(sql, (week, user_id, points_earned))
+    row = cur.execute("SELECT points FROM weekly_points WHERE week = ? AND user_id = ?", (week, user_id)).fetchone()
+    return week, row[0]
+
+
+def points_awarded(user_id, new_points, weekly_total):
+    """Apply a committed award to whichever boards this process has loaded.
+
+    Both totals are absolute, so an award that a reload already picked up
+    is not counted twice. `weekly_total` is record_weekly()'s return value.
+    """
+    user_id = int(user_id)
+    week, weekly_points = weekly_total
+    with _boards_lock:
+        all_time = _boards.get("all")
+        weekly = _boards.get(week)
+    if all_time is not None:
+        all_time.set(user_id, new_points)
+    if weekly is not None:
+        weekly.set(user_id, weekly_points)
+
+
+def user_added(user_id):
+    with _boards_lock:
+        all_time = _boards.get("all")
+    if all_time is not None:
+        all_time.set(int(user_id), 0)
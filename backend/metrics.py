@@ -0,0 +1,143 @@
+"""Counters, gauges and histograms rendered in the Prometheus text format.
+
+Deliberately tiny: no client library, just enough for the /metrics route.
+Label values are passed as keyword arguments:
+
+    metrics.FFMPEG_FAILURES.inc()
+    metrics.STAGE_SECONDS.observe(0.012, stage="ffmpeg")
+"""
+import bisect
+import threading
+
+import timing
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        if not labels:
+            # Export 0 before the first increment so rate() has a baseline
+            self._values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # per-bucket counts (last slot is +Inf), sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, (list(e[0]), e[1], e[2])) for key, e in self._values.items())
+        names = self.labels + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {count}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "endpoint", "status")
+)
+STAGE_SECONDS = Histogram(
+    "scoring_stage_duration_seconds", "Time spent in each scoring pipeline stage.", ("stage",)
+)
+RESULT_CACHE = Counter(
+    "result_cache_lookups_total", "Transcription result cache lookups.", ("result",)
+)
+FFMPEG_FAILURES = Counter("ffmpeg_failures_total", "Uploads ffmpeg could not decode.")
+DB_LOCK_RETRIES = Counter("db_lock_retries_total", "Writes retried because SQLite stayed locked.")
+QUEUE_DEPTH = Gauge("scoring_queue_depth", "Work waiting in each scoring queue.", ("queue",))
+VAD_TRIMMED_SECONDS = Counter(
+    "vad_trimmed_seconds_total", "Seconds of silence VAD trimmed before transcription."
+)
+
+# timing records that are amounts of audio rather than stage durations
+_COUNTED = {"vad_trimmed": VAD_TRIMMED_SECONDS}
+
+
+def stage_sink(name, seconds):
+    counter = _COUNTED.get(name)
+    if counter is not None:
+        counter.inc(seconds)
+        return
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+timing.add_sink(stage_sink)
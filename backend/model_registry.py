@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+
+import backends
+import timing
+
+# Model size used by each scoring route. Both default to WHISPER_MODEL so a
+# single env var is enough for the common case.
+DEFAULT_MODEL = os.environ.get("WHISPER_MODEL", "base")
+ROUTE_MODELS = {
+    "practice": os.environ.get("PRACTICE_WHISPER_MODEL", DEFAULT_MODEL),
+    "challenge": os.environ.get("CHALLENGE_WHISPER_MODEL", DEFAULT_MODEL),
+}
+
+log = logging.getLogger(__name__)
+
+_models = {}
+_locks = {}
+# Whisper installs kv-cache hooks on the shared decoder for every decode, so
+# two threads must never run the same model at once
+_inference_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _lock_for(name):
+    with _registry_lock:
+        lock = _locks.get(name)
+        if lock is None:
+            lock = _locks[name] = threading.Lock()
+        return lock
+
+
+def inference_lock(name):
+    """Lock to hold around any transcribe()/decode() call on model `name`."""
+    with _registry_lock:
+        lock = _inference_locks.get(name)
+        if lock is None:
+            lock = _inference_locks[name] = threading.Lock()
+        return lock
+
+
+def model_name_for(route):
+    return ROUTE_MODELS.get(route, DEFAULT_MODEL)
+
+
+def get_model(name=DEFAULT_MODEL):
+    """Return the shared Whisper model for `name`, loading it on first use."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    # One lock per model size so a slow "small" load doesn't block "base".
+    with _lock_for(name):
+        model = _models.get(name)
+        if model is None:
+            backend = backends.get_backend()
+            log.info("Loading Whisper model '%s' (%s backend)", name, backend.name)
+            with timing.span("model_load"):
+                model = _models[name] = backend.load(name)
+        return model
+
+
+def register(name, model):
+    """Install an already-built model under `name` (benchmarks use a stand-in)."""
+    with _lock_for(name):
+        _models[name] = model
+
+
+def get_model_for(route):
+    return get_model(model_name_for(route))
+
+
+def warm_up(names=None):
+    """Eagerly load every configured model so the first request doesn't pay for it."""
+    for name in names or sorted(set(ROUTE_MODELS.values())):
+        get_model(name)
+
+
+def unload(name=None):
+    """Drop one model (or all of them when `name` is None)."""
+    with _registry_lock:
+        names = [name] if name else list(_models)
+    for n in names:
+        with _lock_for(n):
+            _models.pop(n, None)
+
+
+def reload(name=None):
+    if name and name not in ROUTE_MODELS.values():
+        # Only models a route is configured to use; anything else would load
+        # (and possibly download) arbitrary checkpoints into this process
+        raise ValueError(f"unknown model: {name}")
+    names = [name] if name else sorted(set(_models) | set(ROUTE_MODELS.values()))
+    unload(name)
+    warm_up(names)
+    return names
+
+
+def loaded_models():
+    return sorted(_models)
@@ -0,0 +1,153 @@
+"""Per-user phoneme error profile and the challenge recommendations built on it.
+
+Every scored attempt adds its alignment to user_phoneme_errors: how often
+each target phoneme (stress dropped) was attempted and how often it was
+missed. Recommendations weight the user's weakest phonemes and look them up
+in the catalog's inverted phoneme index, so no challenge scan or G2P happens
+on the request path.
+
+Backfill from existing attempts (from backend/; needs G2P):
+
+    python phoneme_errors.py --backfill [--db pronunciation.db]
+"""
+import argparse
+import heapq
+import os
+import sqlite3
+
+import db as db_layer
+
+# Weakest phonemes used for a recommendation, and how many postings per phoneme
+WEAK_PHONEMES = int(os.environ.get("RECOMMEND_WEAK_PHONEMES", "5"))
+POSTINGS_PER_PHONEME = int(os.environ.get("RECOMMEND_POSTINGS_PER_PHONEME", "200"))
+# Phonemes seen fewer times than this aren't trusted as weaknesses yet
+MIN_ATTEMPTS = int(os.environ.get("RECOMMEND_MIN_ATTEMPTS", "3"))
+# Challenges already won at this accuracy are not recommended again
+MASTERED_ACCURACY = 80
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_phoneme_errors (
+    user_id INTEGER NOT NULL,
+    phoneme TEXT NOT NULL,
+    errors INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, phoneme),
+    FOREIGN KEY(user_id) REFERENCES users(id)
+);
+"""
+
+
+def base_phoneme(token):
+    """ARPAbet symbol without its stress digit ("AH0" -> "AH")."""
+    return token.rstrip("012")
+
+
+def _counts(alignment):
+    counts = {}
+    for step in alignment:
+        if step["target"] is None:
+            continue
+        entry = counts.setdefault(base_phoneme(step["target"]), [0, 0])
+        entry[0] += step["op"] != "match"
+        entry[1] += 1
+    return counts
+
+
+def record_alignment(cur, user_id, alignment):
+    """Fold one attempt's alignment into the profile; call inside the attempt's transaction."""
+    cur.executemany(
+        """
+        INSERT INTO user_phoneme_errors (user_id, phoneme, errors, attempts) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, phoneme) DO UPDATE SET
+            errors = errors + excluded.errors,
+            attempts = attempts + excluded.attempts
+        """,
+        [(user_id, phoneme, errors, attempts) for phoneme, (errors, attempts) in _counts(alignment).items()],
+    )
+
+
+def weak_phonemes(db, user_id, limit=WEAK_PHONEMES, min_attempts=MIN_ATTEMPTS):
+    """[(phoneme, error rate, attempts)] for the user's most-missed phonemes."""
+    rows = db.execute(
+        "SELECT phoneme, errors, attempts FROM user_phoneme_errors WHERE user_id = ? AND attempts >= ? AND errors > 0",
+        (user_id, min_attempts),
+    ).fetchall()
+    # Damped so two misses out of two don't outrank twenty out of forty
+    ranked = [(row[0], row[1] / (row[2] + 2), row[2]) for row in rows]
+    return heapq.nlargest(limit, ranked, key=lambda r: (r[1], r[2]))
+
+
+def mastered_challenges(db, user_id):
+    return {
+        row[0]
+        for row in db.execute(
+            "SELECT DISTINCT challenge_id FROM user_challenges WHERE user_id = ? AND accuracy >= ?",
+            (user_id, MASTERED_ACCURACY),
+        )
+    }
+
+
+def recommend(snapshot, weak, limit=10, exclude=(), per_phoneme=POSTINGS_PER_PHONEME):
+    """Challenges that exercise the weak phonemes most, best first.
+
+    Each challenge scores sum(error rate x share of its phonemes) over the
+    weak phonemes it contains. Only the densest `per_phoneme` postings of
+    each phoneme are read. Returns [(challenge row, [phonemes it targets])].
+    """
+    scores = {}
+    targets = {}
+    for phoneme, rate, _ in weak:
+        for density, challenge_id in snapshot.postings.get(phoneme, ())[:per_phoneme]:
+            if challenge_id in exclude:
+                continue
+            scores[challenge_id] = scores.get(challenge_id, 0.0) + rate * density
+            targets.setdefault(challenge_id, []).append(phoneme)
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [(snapshot.get(challenge_id), targets[challenge_id]) for challenge_id, _ in best]
+
+
+def backfill(db):
+    """Rebuild user_phoneme_errors by re-aligning every stored attempt."""
+    import phonemes
+    import scoring
+
+    db.executescript(SCHEMA)
+    totals = {}
+    rows = db.execute(
+        "SELECT user_id, target_text, transcript FROM attempts "
+        "WHERE user_id IS NOT NULL AND target_text IS NOT NULL AND transcript IS NOT NULL"
+    )
+    for user_id, target_text, transcript in rows:
+        alignment = scoring.align(phonemes.phonemes(target_text), phonemes.phonemes(transcript)).alignment
+        user = totals.setdefault(user_id, {})
+        for phoneme, (errors, attempts) in _counts(alignment).items():
+            entry = user.setdefault(phoneme, [0, 0])
+            entry[0] += errors
+            entry[1] += attempts
+    with db:
+        db.execute("DELETE FROM user_phoneme_errors")
+        db.executemany(
+            "INSERT INTO user_phoneme_errors (user_id, phoneme, errors, attempts) VALUES (?, ?, ?, ?)",
+            [
+                (user_id, phoneme, errors, attempts)
+                for user_id, user in totals.items()
+                for phoneme, (errors, attempts) in user.items()
+            ],
+        )
+    return len(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the user_phoneme_errors profile table.")
+    parser.add_argument("--db", default=db_layer.DB_PATH)
+    parser.add_argument("--backfill", action="store_true", help="rebuild the profiles from attempts")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do; pass --backfill")
+    db = sqlite3.connect(args.db)
+    print(f"Backfilled phoneme errors for {backfill(db)} users")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
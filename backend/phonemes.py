@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+from functools import lru_cache
+
+G2P_CACHE_SIZE = int(os.environ.get("G2P_CACHE_SIZE", "4096"))
+# NLTK data is provisioned ahead of time, e.g.
+#   python -m nltk.downloader -d backend/nltk_data averaged_perceptron_tagger \
+#       averaged_perceptron_tagger_eng cmudict
+# Workers never download it themselves unless NLTK_ALLOW_DOWNLOAD=1.
+NLTK_DATA_DIR = os.environ.get("NLTK_DATA", os.path.join(os.path.dirname(__file__), "nltk_data"))
+NLTK_ALLOW_DOWNLOAD = os.environ.get("NLTK_ALLOW_DOWNLOAD", "0") == "1"
+# The first two are what g2p_en looks for on import; pos_tag() in current
+# NLTK releases loads the _eng tagger.
+NLTK_RESOURCES = {
+    "taggers/averaged_perceptron_tagger.zip": "averaged_perceptron_tagger",
+    "corpora/cmudict.zip": "cmudict",
+    "taggers/averaged_perceptron_tagger_eng": "averaged_perceptron_tagger_eng",
+}
+
+_g2p = None
+_g2p_lock = threading.Lock()
+_whitespace = re.compile(r"\s+")
+
+
+def _configure_nltk():
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    for resource, package in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if not NLTK_ALLOW_DOWNLOAD:
+                raise RuntimeError(
+                    f"NLTK resource '{package}' not found in {NLTK_DATA_DIR}; "
+                    f"run: python -m nltk.downloader -d {NLTK_DATA_DIR} {package}"
+                )
+            nltk.download(package, download_dir=NLTK_DATA_DIR)
+
+
+def _engine():
+    # G2p() loads CMUdict and the neural model, so build it once per process.
+    global _g2p
+    if _g2p is None:
+        with _g2p_lock:
+            if _g2p is None:
+                # g2p_en checks for (and may download) NLTK data on import,
+                # so the local data path has to be in place first
+                _configure_nltk()
+                from g2p_en import G2p
+
+                _g2p = G2p()
+    return _g2p
+
+
+def warm_up():
+    _engine()
+
+
+def normalize(text):
+    return _whitespace.sub(" ", (text or "").strip().lower())
+
+
+@lru_cache(maxsize=G2P_CACHE_SIZE)
+def _phonemes_normalized(text):
+    engine = _engine()
+    # The tagger/model inside G2p are not documented as thread-safe.
+    with _g2p_lock:
+        return tuple(engine(text))
+
+
+def phonemes(text):
+    """Return the raw G2P token sequence for `text` (cached)."""
+    return _phonemes_normalized(normalize(text))
+
+
+def to_column(tokens):
+    """Serialize tokens for the challenges.phonemes column (space separated)."""
+    return " ".join(t for t in tokens if t.strip())
+
+
+def from_column(value):
+    return tuple((value or "").split())
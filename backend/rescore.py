@@ -0,0 +1,170 @@
+"""Recompute attempts.accuracy for stored attempts with the current scoring rules.
+
+Usage (from backend/):
+
+    python rescore.py [--db pronunciation.db] [--workers 4] [--chunk-size 2000]
+
+Rows are streamed by id in chunks, scored in a process pool and written back
+in one transaction per chunk together with the job's progress, so an
+interrupted run picks up where it stopped. Use --restart to start over.
+
+Once every chunk is written, and if the run rescored anything, the tables
+derived from attempts are rebuilt to match: user_challenges accuracies,
+user_stats and user_phoneme_errors. Points already awarded are left alone.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import db as db_layer
+import phoneme_errors
+import phonemes
+import scoring
+import user_stats
+
+
+def _score_chunk(rows, scorer, ignore_stress):
+    """Runs in a worker process; returns [(accuracy, attempt_id), ...]."""
+    pairs = [(phonemes.phonemes(target or ""), phonemes.phonemes(transcript or "")) for _, target, transcript in rows]
+    if scorer == "phoneme":
+        accuracies = scoring.score_batch(pairs, ignore_stress=ignore_stress)
+    else:
+        accuracies = [scoring.score(t, s, scorer).accuracy for t, s in pairs]
+    return [(float(acc), row[0]) for acc, row in zip(accuracies, rows)]
+
+
+def _chunks(db, start_id, chunk_size):
+    last_id = start_id
+    while True:
+        rows = db.execute(
+            "SELECT id, target_text, transcript FROM attempts WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def _progress(db, job):
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rescore_progress (
+            job TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            updated_at TEXT
+        )
+        """
+    )
+    row = db.execute("SELECT last_id, rows FROM rescore_progress WHERE job = ?", (job,)).fetchone()
+    db.commit()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def refresh_derived(db):
+    """Bring the rollups in line with the rescored attempts."""
+    with db:
+        # One user_challenges row per challenge attempt, written with the
+        # attempt's created_at as completed_at; copy each its own new score
+        db.execute(
+            """
+            UPDATE user_challenges SET accuracy = (
+                SELECT a.accuracy FROM attempts a
+                WHERE a.user_id = user_challenges.user_id AND a.challenge_id = user_challenges.challenge_id
+                  AND a.created_at = user_challenges.completed_at
+                ORDER BY a.id LIMIT 1
+            )
+            WHERE EXISTS (
+                SELECT 1 FROM attempts a
+                WHERE a.user_id = user_challenges.user_id AND a.challenge_id = user_challenges.challenge_id
+                  AND a.created_at = user_challenges.completed_at
+            )
+            """
+        )
+    print(f"Rebuilt user_stats for {user_stats.backfill(db)} users")
+    print(f"Rebuilt phoneme errors for {phoneme_errors.backfill(db)} users")
+
+
+def rescore(db_path, job="default", workers=None, chunk_size=2000, scorer=None, ignore_stress=None, restart=False):
+    scorer = scorer or scoring.SCORER
+    scoring.get_scorer(scorer)
+    if ignore_stress is None:
+        ignore_stress = scoring.IGNORE_STRESS
+    workers = workers or os.cpu_count() or 1
+
+    # Reads and writes share one connection; chunks are read ahead of the
+    # writes, which is fine because only accuracy is updated.
+    db = sqlite3.connect(db_path)
+    start_id, done = _progress(db, job)
+    if restart:
+        with db:
+            db.execute("DELETE FROM rescore_progress WHERE job = ?", (job,))
+        start_id, done = 0, 0
+    if start_id:
+        print(f"Resuming job '{job}' after attempt id {start_id} ({done} rows already rescored)")
+
+    started = time.perf_counter()
+    processed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        chunks = _chunks(db, start_id, chunk_size)
+
+        def fill():
+            while len(pending) < workers * 2:
+                rows = next(chunks, None)
+                if rows is None:
+                    return
+                pending.append((rows[-1][0], pool.submit(_score_chunk, rows, scorer, ignore_stress)))
+
+        fill()
+        while pending:
+            last_id, future = pending.popleft()
+            results = future.result()
+            with db:
+                db.executemany("UPDATE attempts SET accuracy = ? WHERE id = ?", results)
+                db.execute(
+                    "INSERT OR REPLACE INTO rescore_progress (job, last_id, rows, updated_at) VALUES (?, ?, ?, datetime('now'))",
+                    (job, last_id, done + processed + len(results)),
+                )
+            processed += len(results)
+            elapsed = time.perf_counter() - started
+            print(f"{done + processed} rows rescored (last id {last_id}), {processed / elapsed:.0f} rows/sec")
+            fill()
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {processed} rows in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+    if processed:
+        # A finished job re-run has nothing new; skip the G2P-heavy rebuild
+        refresh_derived(db)
+    db.close()
+    return processed, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=db_layer.DB_PATH)
+    parser.add_argument("--job", default="default", help="progress key; separate jobs resume independently")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--scorer", choices=sorted(scoring.SCORERS), default=scoring.SCORER)
+    parser.add_argument("--ignore-stress", action="store_true", default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress for this job")
+    args = parser.parse_args()
+    rescore(
+        args.db,
+        job=args.job,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        scorer=args.scorer,
+        ignore_stress=args.ignore_stress,
+        restart=args.restart,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL_SECONDS", "86400"))
+# Optional second tier in the result_cache table, shared by every worker
+RESULT_CACHE_DISK = os.environ.get("RESULT_CACHE_DISK", "0") == "1"
+RESULT_CACHE_DISK_MAX = int(os.environ.get("RESULT_CACHE_DISK_MAX", "50000"))
+# "award" scores a duplicate upload like a fresh one, "none" gives it 0 points
+CACHE_HIT_POINTS = os.environ.get("CACHE_HIT_POINTS", "award")
+
+_PRUNE_EVERY = 500
+# Bumped whenever the stored value layout changes so old disk rows are ignored
+_FORMAT = "2"
+
+
+class ResultCache:
+    """Bounded LRU + TTL cache of transcription results by upload content."""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, disk=RESULT_CACHE_DISK):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(audio_bytes, model_name, options=None, backend=""):
+        # Backends disagree on some clips, so each gets its own entries
+        h = hashlib.sha256(_FORMAT.encode())
+        h.update(f"{backend}:{model_name}".encode())
+        h.update(json.dumps(options or {}, sort_keys=True).encode())
+        h.update(audio_bytes)
+        return h.hexdigest()
+
+    def get(self, key, db=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.disk and db is not None:
+            row = db.execute(
+                "SELECT transcript, phonemes, created_at FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row["created_at"] <= self.ttl:
+                value = {"transcript": row["transcript"], "phonemes": row["phonemes"]}
+                self._remember(key, value, row["created_at"])
+                with self._lock:
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, db=None):
+        now = time.time()
+        self._remember(key, value, now)
+        if self.disk and db is not None:
+            with self._lock:
+                self._puts += 1
+                prune = self._puts % _PRUNE_EVERY == 0
+            # Committed on its own; the attempt itself is written elsewhere
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, transcript, phonemes, created_at) VALUES (?, ?, ?, ?)",
+                    (key, value["transcript"], value["phonemes"], now),
+                )
+                if prune:
+                    self._prune_disk(db, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remember(self, key, value, created):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _prune_disk(self, db, now):
+        db.execute("DELETE FROM result_cache WHERE created_at < ?", (now - self.ttl,))
+        db.execute(
+            "DELETE FROM result_cache WHERE key IN ("
+            " SELECT key FROM result_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (RESULT_CACHE_DISK_MAX,),
+        )
+
+
+cache = ResultCache()
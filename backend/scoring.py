@@ -0,0 +1,179 @@
+import os
+import threading
+from typing import List, NamedTuple, Optional
+
+import Levenshtein
+import numpy as np
+
+# "phoneme" aligns ARPAbet tokens; "character" is the original edit distance
+# over the joined phoneme strings, kept for comparing against old scores.
+SCORER = os.environ.get("SCORER", "phoneme")
+# Treat AH0/AH1/AH2 as the same phoneme
+IGNORE_STRESS = os.environ.get("SCORE_IGNORE_STRESS", "0") == "1"
+
+# Pairs are scored in chunks of similar length to limit padding waste
+BATCH_CHUNK = 4096
+
+_vocab = {}
+_vocab_lock = threading.Lock()
+
+
+class PhonemeScore(NamedTuple):
+    accuracy: float
+    distance: int
+    # One dict per aligned position: op is match/substitution/deletion/insertion,
+    # target/spoken hold the phonemes involved (None on the missing side).
+    alignment: Optional[List[dict]] = None
+
+
+def phoneme_accuracy(target_phonemes, spoken_phonemes):
+    """Percentage similarity of two joined phoneme strings (edit distance based)."""
+    max_len = max(len(target_phonemes), len(spoken_phonemes))
+    if max_len == 0:
+        return 100.0
+    dist = Levenshtein.distance(target_phonemes, spoken_phonemes)
+    return round(100 * (1 - dist / max_len), 2)
+
+
+def clean_tokens(tokens):
+    """Keep ARPAbet symbols only, dropping the word breaks and punctuation G2P emits."""
+    return [t for t in tokens if t and t[0].isalpha()]
+
+
+def _strip_stress(token):
+    return token.rstrip("012")
+
+
+def encode(tokens, ignore_stress=IGNORE_STRESS):
+    ids = np.empty(len(tokens), np.int32)
+    with _vocab_lock:
+        for i, token in enumerate(tokens):
+            if ignore_stress:
+                token = _strip_stress(token)
+            code = _vocab.get(token)
+            if code is None:
+                code = _vocab[token] = len(_vocab)
+            ids[i] = code
+    return ids
+
+
+def _accuracy(distance, n, m):
+    longest = max(n, m)
+    if longest == 0:
+        return 100.0
+    return round(100 * (1 - distance / longest), 2)
+
+
+def _dp_rows(target, spoken):
+    """Full Levenshtein matrix for two encoded sequences, one vectorized row at a time."""
+    n, m = len(target), len(spoken)
+    cols = np.arange(m + 1, dtype=np.int32)
+    d = np.empty((n + 1, m + 1), np.int32)
+    d[0] = cols
+    for i in range(1, n + 1):
+        prev = d[i - 1]
+        cand = np.empty(m + 1, np.int32)
+        cand[0] = i
+        cand[1:] = np.minimum(prev[1:] + 1, prev[:-1] + (spoken != target[i - 1]))
+        # Insertions chain left to right: d[j] = min(cand[j], d[j-1] + 1),
+        # which is a running minimum once the column index is subtracted.
+        d[i] = np.minimum.accumulate(cand - cols) + cols
+    return d
+
+
+def align(target_tokens, spoken_tokens, ignore_stress=IGNORE_STRESS):
+    """Align two phoneme token sequences and score them."""
+    target_tokens = clean_tokens(target_tokens)
+    spoken_tokens = clean_tokens(spoken_tokens)
+    target = encode(target_tokens, ignore_stress)
+    spoken = encode(spoken_tokens, ignore_stress)
+    d = _dp_rows(target, spoken)
+
+    alignment = []
+    i, j = len(target), len(spoken)
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and d[i, j] == d[i - 1, j - 1] + (target[i - 1] != spoken[j - 1]):
+            op = "match" if target[i - 1] == spoken[j - 1] else "substitution"
+            alignment.append({"op": op, "target": target_tokens[i - 1], "spoken": spoken_tokens[j - 1]})
+            i, j = i - 1, j - 1
+        elif i > 0 and d[i, j] == d[i - 1, j] + 1:
+            alignment.append({"op": "deletion", "target": target_tokens[i - 1], "spoken": None})
+            i -= 1
+        else:
+            alignment.append({"op": "insertion", "target": None, "spoken": spoken_tokens[j - 1]})
+            j -= 1
+    alignment.reverse()
+
+    distance = int(d[-1, -1])
+    return PhonemeScore(_accuracy(distance, len(target), len(spoken)), distance, alignment)
+
+
+def _distances_padded(targets, spokens):
+    """Edit distances for many encoded pairs at once.
+
+    Pairs are padded into (batch, length) arrays and the DP advances one
+    target position per step across the whole batch.
+    """
+    b = len(targets)
+    n = np.array([len(t) for t in targets], np.int64)
+    m = np.array([len(s) for s in spokens], np.int64)
+    big_n, big_m = int(n.max(initial=0)), int(m.max(initial=0))
+    # Different pad values on each side so padding never counts as a match
+    t_pad = np.full((b, big_n), -1, np.int32)
+    s_pad = np.full((b, big_m), -2, np.int32)
+    for k in range(b):
+        t_pad[k, : n[k]] = targets[k]
+        s_pad[k, : m[k]] = spokens[k]
+
+    rows = np.arange(b)
+    cols = np.arange(big_m + 1, dtype=np.int32)
+    prev = np.tile(cols, (b, 1))
+    result = m.astype(np.int32)
+    cand = np.empty_like(prev)
+    for i in range(1, big_n + 1):
+        cand[:, 0] = i
+        cand[:, 1:] = np.minimum(prev[:, 1:] + 1, prev[:, :-1] + (s_pad != t_pad[:, i - 1 : i]))
+        cur = np.minimum.accumulate(cand - cols, axis=1) + cols
+        finished = n == i
+        result[finished] = cur[rows[finished], m[finished]]
+        prev = cur
+    return result
+
+
+def score_batch(pairs, ignore_stress=IGNORE_STRESS):
+    """Accuracy for each (target_tokens, spoken_tokens) pair, without alignments."""
+    encoded = [
+        (encode(clean_tokens(t), ignore_stress), encode(clean_tokens(s), ignore_stress))
+        for t, s in pairs
+    ]
+    accuracies = np.empty(len(encoded), np.float64)
+    order = sorted(range(len(encoded)), key=lambda k: (len(encoded[k][0]), len(encoded[k][1])))
+    for start in range(0, len(order), BATCH_CHUNK):
+        chunk = order[start : start + BATCH_CHUNK]
+        distances = _distances_padded([encoded[k][0] for k in chunk], [encoded[k][1] for k in chunk])
+        for k, distance in zip(chunk, distances):
+            accuracies[k] = _accuracy(int(distance), len(encoded[k][0]), len(encoded[k][1]))
+    return accuracies
+
+
+def _character_scorer(target_tokens, spoken_tokens, ignore_stress=IGNORE_STRESS):
+    accuracy = phoneme_accuracy("".join(target_tokens), "".join(spoken_tokens))
+    return PhonemeScore(accuracy, None, None)
+
+
+SCORERS = {
+    "phoneme": align,
+    "character": _character_scorer,
+}
+
+
+def get_scorer(name=None):
+    name = name or SCORER
+    try:
+        return SCORERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scorer '{name}'. Available: {', '.join(sorted(SCORERS))}")
+
+
+def score(target_tokens, spoken_tokens, scorer=None):
+    return get_scorer(scorer)(target_tokens, spoken_tokens)
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import audio as audio_io
+import jobs
+import phonemes
+import workers
+
+# Trailing silence after speech that counts as "the student stopped talking"
+END_SILENCE_MS = int(os.environ.get("STREAM_END_SILENCE_MS", "700"))
+# Audio kept per session; anything older is dropped from the ring buffer
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "30"))
+MAX_SESSIONS = int(os.environ.get("STREAM_MAX_SESSIONS", "64"))
+SESSION_TTL_SECONDS = int(os.environ.get("STREAM_SESSION_TTL_SECONDS", "120"))
+EARLY_WORKERS = int(os.environ.get("STREAM_EARLY_WORKERS", "4"))
+
+_early_executor = ThreadPoolExecutor(max_workers=EARLY_WORKERS, thread_name_prefix="stream-early")
+
+
+class RingBuffer:
+    """The most recent `capacity` float32 samples of a recording."""
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, np.float32)
+        self.capacity = capacity
+        self.total = 0
+
+    def append(self, samples):
+        if len(samples) > self.capacity:
+            self.total += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = self.total % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[: len(samples) - first] = samples[first:]
+        self.total += len(samples)
+
+    def view(self):
+        """Buffered samples, oldest first, as one contiguous copy."""
+        if self.total <= self.capacity:
+            return self._data[: self.total].copy()
+        start = self.total % self.capacity
+        return np.concatenate([self._data[start:], self._data[:start]])
+
+
+class StreamSession:
+    """A recording uploaded in chunks while the student is still speaking.
+
+    Chunks are decoded by a persistent ffmpeg process into a ring buffer.
+    The same energy VAD as trim_silence() watches the decoded frames; once
+    speech has been followed by END_SILENCE_MS of silence, transcription of
+    what is buffered starts in the background. finish() reuses that result
+    unless more speech arrived afterwards.
+    """
+
+    def __init__(self, kind, route, score_args, decode_options=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.route = route
+        # Everything score_practice()/score_challenge() need besides the audio
+        self.score_args = score_args
+        self.decode_options = decode_options or {}
+        self.received = 0
+        self.updated = time.time()
+        self.speech_ended = False
+        self._lock = threading.Lock()
+        self._buffer = RingBuffer(int(STREAM_MAX_SECONDS * audio_io.SAMPLE_RATE))
+        self._frame = int(audio_io.SAMPLE_RATE * audio_io.VAD_FRAME_MS / 1000)
+        self._partial = np.zeros(0, np.float32)
+        # Frame RMS over the same window as the ring buffer, so the threshold
+        # costs the same per chunk however long the recording runs
+        self._rms = deque(maxlen=self._buffer.capacity // self._frame)
+        self._silent_frames = 0
+        self._last_speech = None
+        self._early = None
+        self._decoder = audio_io.StreamDecoder(self._on_samples)
+
+    def feed(self, chunk):
+        self.updated = time.time()
+        self.received += len(chunk)
+        self._decoder.feed(chunk)
+
+    def _on_samples(self, samples):
+        # Runs on the decoder's reader thread
+        with self._lock:
+            self._buffer.append(samples)
+            samples = np.concatenate([self._partial, samples])
+            n = len(samples) // self._frame
+            self._partial = samples[n * self._frame:]
+            if n == 0:
+                return
+            frames = samples[: n * self._frame].reshape(n, self._frame)
+            values = np.sqrt(np.mean(frames * frames, axis=1))
+            self._rms.extend(values.tolist())
+            threshold = audio_io.speech_threshold(np.asarray(self._rms))
+            end_frames = END_SILENCE_MS // audio_io.VAD_FRAME_MS
+            # Sample position where the first new frame ends
+            frame_end = self._buffer.total - len(self._partial) - (n - 1) * self._frame
+            for i, value in enumerate(values):
+                if value >= threshold:
+                    self._silent_frames = 0
+                    self._last_speech = frame_end + i * self._frame
+                    self.speech_ended = False
+                else:
+                    self._silent_frames += 1
+            if self._last_speech is not None and self._silent_frames >= end_frames and not self.speech_ended:
+                self.speech_ended = True
+                # Remember how much audio the early result covers
+                self._early = (self._buffer.total, _early_executor.submit(self._transcribe, self._buffer.view()))
+
+    def _transcribe(self, samples):
+        transcript, spoken_column = workers.transcribe_decoded(samples, self.route, self.decode_options)
+        return transcript, phonemes.from_column(spoken_column), False
+
+    def finish(self):
+        """Flush the decoder and return ``(transcript, phonemes, cached)``."""
+        self._decoder.close()
+        with self._lock:
+            early, last_speech = self._early, self._last_speech
+            samples = self._buffer.view()
+        if early is not None and last_speech is not None and last_speech <= early[0]:
+            # Only silence since the early transcription started
+            return early[1].result()
+        return self._transcribe(samples)
+
+    def abort(self):
+        self._decoder.abort()
+
+
+class SessionStore:
+    """Open streaming sessions by id, expired after SESSION_TTL_SECONDS idle.
+
+    A daemon thread reaps abandoned sessions, so their ffmpeg process and
+    reader thread go away even when no other stream is started.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL_SECONDS):
+        self._max_sessions = max_sessions
+        self._ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaper = threading.Thread(target=self._reap, name="stream-reaper", daemon=True)
+        self._reaper.start()
+
+    def create(self, kind, route, score_args, decode_options=None):
+        self._expire()
+        with self._lock:
+            if len(self._sessions) >= self._max_sessions:
+                raise jobs.QueueFull(f"{len(self._sessions)} streaming sessions already open")
+        session = StreamSession(kind, route, score_args, decode_options)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        self._expire()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _expire(self):
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            expired = [s for s in self._sessions.values() if s.updated < cutoff]
+            for session in expired:
+                del self._sessions[session.id]
+        # Killing ffmpeg can block briefly; do it outside the lock
+        for session in expired:
+            session.abort()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, self._ttl / 2))
+            self._expire()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The backend is a set of flat modules imported by name, as app.py does
+sys.path.insert(0, BACKEND)
+
+import db as db_layer  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A scratch copy of the shipped database, used by everything in db.py."""
+    path = str(tmp_path / "pronunciation.db")
+    shutil.copy(os.path.join(BACKEND, "pronunciation.db"), path)
+    monkeypatch.setattr(db_layer, "DB_PATH", path)
+    return path
+
+
+@pytest.fixture
+def memory_db():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def login():
+    """Sign up and log in through the API; returns (user, auth headers)."""
+
+    def sign_in(client, username="learner", password="pw"):
+        client.post("/signup", json={"username": username, "password": password})
+        response = client.post("/login", json={"username": username, "password": password})
+        assert response.status_code == 200
+        return response.json["user"], {"Authorization": f"Bearer {response.json['token']}"}
+
+    return sign_in
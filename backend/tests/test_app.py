@@ -0,0 +1,183 @@
+import sqlite3
+import sys
+
+import pytest
+
+import db as db_layer
+
+
+@pytest.fixture
+def fresh_db_path(tmp_path, monkeypatch):
+    """An empty database file, as on a first install."""
+    path = str(tmp_path / "fresh.db")
+    monkeypatch.setattr(db_layer, "DB_PATH", path)
+    return path
+
+
+def tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("fixture", ["db_path", "fresh_db_path"])
+def test_create_app_migrates_without_warm_up(request, fixture):
+    path = request.getfixturevalue(fixture)
+    import app
+
+    app.create_app(warm=False)
+    assert {"users", "attempts", "challenges", "user_challenges", "user_stats",
+            "weekly_points", "result_cache", "user_phoneme_errors"} <= tables(path)
+    # Schema work must not drag the ML stack into the web process
+    assert not {"torch", "whisper", "g2p_en"} & set(sys.modules)
+
+
+def test_cold_app_records_and_reports_attempts(db_path, login):
+    import app
+
+    flask_app = app.create_app(warm=False)
+    client = flask_app.test_client()
+    user, headers = login(client)
+
+    with flask_app.app_context():
+        challenge = app.catalog.current(app.get_db()).get(1)
+        # What score_challenge() writes once transcription is done
+        alignment = [{"op": "match", "target": "HH", "spoken": "HH"}, {"op": "deletion", "target": "AH0", "spoken": None}]
+        db_layer.write(app._store_attempt, user["id"], challenge["word"], "hell", 90.0, 45, challenge, alignment)
+
+    profile = client.get("/profile", headers=headers)
+    assert profile.status_code == 200
+    assert profile.json["profile"]["totalSessions"] == 1
+    assert profile.json["profile"]["challengesWon"]["easy"] == 1
+
+    history = client.get("/history", headers=headers)
+    assert [row["challenge_id"] for row in history.json["history"]] == [1]
+    assert client.get("/leaderboard/rank", headers=headers).json["points"] == 45
+
+
+def test_identity_routes_need_a_token(db_path, login):
+    import app
+
+    client = app.create_app(warm=False).test_client()
+    user, _ = login(client)
+    assert client.get(f"/profile?user_id={user['id']}").status_code == 401
+    assert client.post("/practice", data={"user_id": user["id"], "target_text": "hi"}).status_code == 401
+    assert client.post("/stream", json={"user_id": user["id"], "target_text": "hi"}).status_code == 401
+
+
+def test_missing_secret_key_is_reported_at_startup(db_path, monkeypatch, caplog):
+    import app
+    import auth
+
+    monkeypatch.setattr(auth, "SECRET_KEY", "")
+    app.create_app(warm=False)
+    assert "SECRET_KEY is not set" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(auth, "SECRET_KEY", "configured")
+    app.create_app(warm=False)
+    assert "SECRET_KEY" not in caplog.text
+
+
+def test_model_reload_needs_the_admin_token_and_a_configured_model(db_path, monkeypatch):
+    import app
+    import auth
+    import model_registry
+
+    reloaded = []
+    monkeypatch.setattr(model_registry, "unload", lambda name=None: None)
+    monkeypatch.setattr(model_registry, "warm_up", lambda names=None: reloaded.extend(names))
+    monkeypatch.setattr(app.workers, "SCORING_WORKERS", 0)
+    client = app.create_app(warm=False).test_client()
+    body = {"model": model_registry.ROUTE_MODELS["practice"]}
+
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "")
+    assert client.post("/models/reload", json=body, headers={"X-Admin-Token": ""}).status_code == 404
+
+    monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/models/reload", json=body).status_code == 403
+    assert client.post("/models/reload", json=body, headers={"X-Admin-Token": "guess"}).status_code == 403
+
+    admin = {"X-Admin-Token": "s3cret"}
+    assert client.post("/models/reload", json={"model": "../../evil"}, headers=admin).status_code == 400
+    assert reloaded == []
+    response = client.post("/models/reload", json=body, headers=admin)
+    assert response.status_code == 200
+    assert reloaded == [body["model"]]
+
+
+def test_cold_start_fills_challenge_phonemes_on_first_scoring(fresh_db_path, monkeypatch, caplog, login):
+    import app
+
+    monkeypatch.setattr(app, "_challenge_phonemes_checked", False)
+    monkeypatch.setattr(app.workers, "text_phonemes", lambda text: ("HH", "AH0", "L", "OW1"))
+    flask_app = app.create_app(warm=False)
+    assert "challenges have no precomputed phonemes" in caplog.text
+    user, _ = login(flask_app.test_client())
+
+    with flask_app.app_context():
+        assert app.catalog.current(app.get_db()).postings == {}
+        spoken = ("hello", ("HH", "AH0", "L", "OW1"), True)
+        _, status = app.score_practice(user["id"], "hello", None, transcribe=lambda: spoken)
+        assert status == 200
+        assert app.get_db().execute("SELECT COUNT(*) FROM challenges WHERE phonemes IS NULL").fetchone()[0] == 0
+        assert app.catalog.current(app.get_db()).postings["OW"]
+
+
+def test_fast_path_decoding_is_opt_in(monkeypatch):
+    import app
+
+    challenge = {"word": "hello", "difficulty": "easy"}
+    assert app._challenge_decode_options(challenge) == {}
+    monkeypatch.setattr(app.inference, "FAST_PATH_DIFFICULTIES", {"easy"})
+    assert app._challenge_decode_options(challenge) == app.inference.fast_path_options("hello")
+
+
+def test_history_route_pages_and_exports(db_path, login):
+    import app
+
+    flask_app = app.create_app(warm=False)
+    client = flask_app.test_client()
+    user, headers = login(client)
+    with flask_app.app_context():
+        for word in ("one", "two", "three"):
+            db_layer.write(app._store_attempt, user["id"], word, word, 90.0, 9)
+
+    first = client.get("/history?limit=2", headers=headers).json
+    assert [row["target_text"] for row in first["history"]] == ["three", "two"]
+    rest = client.get(f"/history?limit=2&before={first['next_before']}", headers=headers).json
+    assert [row["target_text"] for row in rest["history"]] == ["one"]
+    assert rest["next_before"] is None
+    assert client.get("/history?before=garbage", headers=headers).status_code == 400
+
+    export = client.get("/history?format=ndjson", headers=headers)
+    assert export.mimetype == "application/x-ndjson"
+    assert len(export.data.splitlines()) == 3
+
+
+def test_login_issues_a_token_and_upgrades_old_hashes(db_path):
+    import app
+    import auth
+    from werkzeug.security import generate_password_hash
+
+    flask_app = app.create_app(warm=False)
+    with flask_app.app_context():
+        db = app.get_db()
+        db.execute(
+            "INSERT INTO users (username, password_hash, points, level, created_at) VALUES (?, ?, 0, 2, '2026-01-01')",
+            ("veteran", generate_password_hash("pw", method="pbkdf2:sha256:1000")),
+        )
+        db.commit()
+
+    client = flask_app.test_client()
+    response = client.post("/login", json={"username": "veteran", "password": "pw"})
+    assert response.status_code == 200
+    user = response.json["user"]
+    assert auth.verify_token(response.json["token"]) == {"uid": user["id"], "level": 2}
+
+    with flask_app.app_context():
+        stored = app.get_db().execute("SELECT password_hash FROM users WHERE id = ?", (user["id"],)).fetchone()[0]
+    assert stored.startswith(auth.HASH_METHOD + "$")
+    assert client.post("/login", json={"username": "veteran", "password": "nope"}).status_code == 400
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import audio
+import metrics
+
+SAMPLE_RATE = audio.SAMPLE_RATE
+
+
+def tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_leading_and_trailing_silence_is_trimmed():
+    speech = tone(1.0)
+    trimmed = audio.trim_silence(np.concatenate([silence(2.0), speech, silence(3.0)]))
+    pad = audio.VAD_PAD_MS / 1000
+    assert abs(len(trimmed) / SAMPLE_RATE - (1.0 + 2 * pad)) < 0.05
+
+
+def test_speech_over_a_noise_floor_is_found():
+    rng = np.random.default_rng(0)
+    noise = (0.02 * rng.standard_normal(4 * SAMPLE_RATE)).astype(np.float32)
+    noise[SAMPLE_RATE:2 * SAMPLE_RATE] += tone(1.0)
+    trimmed = audio.trim_silence(noise)
+    assert len(trimmed) / SAMPLE_RATE < 1.5
+
+
+def test_all_speech_clip_is_kept_whole():
+    speech = tone(2.0)
+    assert len(audio.trim_silence(speech)) == len(speech)
+
+
+@pytest.mark.parametrize("samples", [silence(2.0), silence(0.01), np.zeros(0, np.float32)])
+def test_silent_or_empty_clips_are_rejected(samples):
+    with pytest.raises(audio.NoSpeechError):
+        audio.trim_silence(samples)
+
+
+def test_long_speech_is_rejected():
+    with pytest.raises(ValueError, match="limit is 2s"):
+        audio.trim_silence(tone(3.0), max_speech_seconds=2)
+    assert len(audio.trim_silence(tone(3.0), max_speech_seconds=0)) == 3 * SAMPLE_RATE
+
+
+def test_silent_clips_never_reach_the_model(monkeypatch):
+    import inference
+    import workers
+
+    monkeypatch.setattr(inference, "transcribe", lambda *args, **kwargs: pytest.fail("model was called"))
+    with pytest.raises(audio.NoSpeechError):
+        workers.transcribe_samples(silence(2.0), "practice", {})
+
+
+def test_trimmed_silence_is_counted():
+    before = metrics.VAD_TRIMMED_SECONDS._values[()]
+    audio.trim_silence(np.concatenate([silence(1.0), tone(1.0), silence(1.0)]))
+    trimmed = metrics.VAD_TRIMMED_SECONDS._values[()] - before
+    # Both silent seconds go, less the padding kept either side of speech
+    assert abs(trimmed - (2.0 - 2 * audio.VAD_PAD_MS / 1000)) < 0.05
+    assert "vad_trimmed_seconds_total" in metrics.render()
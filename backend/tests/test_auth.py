@@ -0,0 +1,94 @@
+import pytest
+from flask import Flask
+from itsdangerous import URLSafeTimedSerializer
+
+import auth
+
+USER = {"id": 7, "level": 3}
+
+
+@pytest.fixture
+def flask_app():
+    return Flask(__name__)
+
+
+def caller(flask_app, supplied=None, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token is not None else {}
+    with flask_app.test_request_context(headers=headers):
+        return auth.request_user_id(supplied)
+
+
+def test_token_round_trip():
+    assert auth.verify_token(auth.issue_token(USER)) == {"uid": 7, "level": 3}
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = auth.issue_token(USER)
+    monkeypatch.setattr(auth, "TOKEN_MAX_AGE_SECONDS", -1)
+    assert auth.verify_token(token) is None
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    token = auth.issue_token(USER)
+    assert auth.verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB")) is None
+    foreign = URLSafeTimedSerializer("some other key", salt="session").dumps({"uid": 7, "level": 3})
+    assert auth.verify_token(foreign) is None
+    assert auth.verify_token("garbage") is None
+
+
+def test_request_user_id_comes_from_the_token(flask_app):
+    token = auth.issue_token(USER)
+    assert caller(flask_app, token=token) == 7
+    assert caller(flask_app, supplied="7", token=token) == 7
+
+
+def test_request_user_id_rejects_a_mismatched_user_id(flask_app):
+    with pytest.raises(auth.AuthError) as e:
+        caller(flask_app, supplied="8", token=auth.issue_token(USER))
+    assert e.value.status == 403
+
+
+def test_request_user_id_rejects_a_bad_token(flask_app):
+    with pytest.raises(auth.AuthError) as e:
+        caller(flask_app, token="garbage")
+    assert e.value.status == 401
+
+
+def test_bare_user_id_needs_the_legacy_opt_in(flask_app, monkeypatch):
+    with pytest.raises(auth.AuthError) as e:
+        caller(flask_app, supplied="7")
+    assert e.value.status == 401
+    monkeypatch.setattr(auth, "ALLOW_LEGACY_USER_ID", True)
+    assert caller(flask_app, supplied="7") == "7"
+
+
+def test_password_hash_cost_and_rehash(monkeypatch):
+    password_hash = auth.hash_password("secret")
+    assert password_hash.startswith(auth.HASH_METHOD + "$")
+    assert not auth.needs_rehash(password_hash)
+    assert auth.needs_rehash("pbkdf2:sha256:1000$salt$hash")
+
+
+def test_credential_cache_skips_the_hash_on_repeat(monkeypatch):
+    cache = auth.CredentialCache(size=2, ttl=60)
+    password_hash = auth.hash_password("secret")
+    assert cache.check("ana", "secret", password_hash)
+    assert not cache.check("ana", "wrong", password_hash)
+
+    monkeypatch.setattr(auth, "check_password_hash", lambda *args: pytest.fail("hash was re-checked"))
+    assert cache.check("ana", "secret", password_hash)
+
+
+def test_credential_cache_entries_expire_and_are_bounded(monkeypatch):
+    calls = []
+    monkeypatch.setattr(auth, "check_password_hash", lambda h, p: calls.append(p) or True)
+    cache = auth.CredentialCache(size=1, ttl=0)
+    cache.check("ana", "a", "h")
+    cache.check("ana", "a", "h")
+    assert len(calls) == 2
+
+    cache = auth.CredentialCache(size=1, ttl=60)
+    cache.check("ana", "a", "h")
+    cache.check("bob", "b", "h")
+    cache.check("ana", "a", "h")
+    assert calls[2:] == ["a", "b", "a"]
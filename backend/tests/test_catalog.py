@@ -0,0 +1,84 @@
+import pytest
+
+import catalog
+
+ROWS = [
+    {"id": 1, "word": "hello", "difficulty": "easy", "points": 50, "description": "Basic greeting",
+     "phonemes": "HH AH0 L OW1"},
+    {"id": 2, "word": "world", "difficulty": "easy", "points": 50, "description": "Common word",
+     "phonemes": "W ER1 L D"},
+]
+
+
+class CountingDb:
+    """Just enough of a connection for ChallengeCatalog.load()."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def execute(self, sql):
+        self.queries += 1
+        return [dict(row) for row in self.rows]
+
+
+def test_etag_follows_the_catalog_content():
+    assert catalog.Snapshot(ROWS).etag == catalog.Snapshot([dict(row) for row in ROWS]).etag
+    changed = [dict(ROWS[0], points=75), ROWS[1]]
+    assert catalog.Snapshot(changed).etag != catalog.Snapshot(ROWS).etag
+
+
+def test_snapshot_lists_and_lookups():
+    snapshot = catalog.Snapshot(ROWS)
+    assert [c["word"] for c in snapshot.by_difficulty("easy")] == ["hello", "world"]
+    assert "phonemes" not in snapshot.by_difficulty("easy")[0]
+    assert snapshot.get(1)["phonemes"] == "HH AH0 L OW1"
+    assert snapshot.get(99) is None
+    assert snapshot.by_difficulty("hard") == []
+
+
+def test_current_serves_from_memory_until_stale_or_invalidated(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(catalog.time, "time", lambda: now[0])
+    monkeypatch.setattr(catalog, "REFRESH_SECONDS", 60)
+    db = CountingDb(ROWS)
+    challenges = catalog.ChallengeCatalog()
+
+    first = challenges.current(db)
+    assert challenges.current(db) is first
+    assert db.queries == 1
+
+    challenges.invalidate()
+    assert challenges.current(db) is not first
+    assert db.queries == 2
+
+    now[0] += 60
+    challenges.current(db)
+    assert db.queries == 3
+
+
+@pytest.mark.parametrize("path", ["/challenges?difficulty=easy", "/challenge/1"])
+def test_catalog_routes_answer_revalidation_with_304(db_path, path):
+    import app
+
+    flask_app = app.create_app(warm=False)
+    client = flask_app.test_client()
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+    # Editing a challenge invalidates the catalog and the old validator
+    with flask_app.app_context():
+        db = app.get_db()
+        db.execute("UPDATE challenges SET points = points + 1 WHERE id = 1")
+        db.commit()
+        app.catalog.invalidate()
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
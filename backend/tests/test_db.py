@@ -0,0 +1,46 @@
+import threading
+
+import db as db_layer
+
+
+def test_checkouts_are_never_capped(tmp_path):
+    pool = db_layer.ConnectionPool(str(tmp_path / "pool.db"), size=1)
+    held = [pool.acquire(), pool.acquire(), pool.acquire()]
+    assert len({id(conn) for conn in held}) == 3
+    for conn in held:
+        pool.release(conn)
+    # Only `size` idle connections are kept; the rest are closed
+    assert pool._idle.qsize() == 1
+    assert pool.acquire() is held[0]
+
+
+def test_release_rolls_back_open_transactions(tmp_path):
+    pool = db_layer.ConnectionPool(str(tmp_path / "pool.db"))
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_nested_checkouts_share_a_connection(db_path):
+    outer = db_layer.get_connection()
+    assert db_layer.get_connection() is outer
+    db_layer.release(outer)
+    db_layer.release(outer)
+
+    seen = []
+
+    def other_request():
+        conn = db_layer.get_connection()
+        seen.append(conn)
+        db_layer.release(conn)
+
+    thread = threading.Thread(target=other_request)
+    thread.start()
+    thread.join()
+    # The connection went back to the pool and was reused by the next thread
+    assert seen == [outer]
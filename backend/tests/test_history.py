@@ -0,0 +1,88 @@
+import pytest
+
+import history
+
+
+@pytest.fixture
+def attempts(memory_db):
+    memory_db.execute(
+        """
+        CREATE TABLE attempts (
+            id INTEGER PRIMARY KEY, user_id INTEGER, target_text TEXT, transcript TEXT,
+            accuracy REAL, points_earned INTEGER, created_at TEXT, challenge_id INTEGER
+        )
+        """
+    )
+    rows = []
+    for i in range(1, 8):
+        # Attempts 3 and 4 share a timestamp, so paging has to break the tie by id
+        day = min(i, 3) if i <= 4 else i - 1
+        rows.append((i, 1, f"word{i}", f"word{i}", 90.0, 9, f"2026-01-0{day}T10:00:00", 5 if i % 2 else None))
+    rows.append((99, 2, "other", "other", 50.0, 5, "2026-01-04T10:00:00", None))
+    memory_db.executemany("INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return memory_db
+
+
+def walk(db, user_id, limit, **filters):
+    ids, before = [], None
+    while True:
+        rows, cursor = history.page(db, user_id, limit, before=before, **filters)
+        ids.extend(row["id"] for row in rows)
+        if cursor is None:
+            return ids
+        before = history.decode_cursor(cursor)
+
+
+def test_cursor_round_trip():
+    cursor = history.encode_cursor("2026-01-03T10:00:00", 42)
+    assert "=" not in cursor
+    assert history.decode_cursor(cursor) == ("2026-01-03T10:00:00", 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", history.encode_cursor("x", "y")])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        history.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+def test_pages_cover_every_attempt_once_newest_first(attempts, limit):
+    assert walk(attempts, 1, limit) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_last_page_has_no_cursor(attempts):
+    rows, cursor = history.page(attempts, 1, 7)
+    assert len(rows) == 7
+    assert cursor is None
+
+
+def test_filters_apply_on_every_page(attempts):
+    assert walk(attempts, 1, 1, challenge_id=5) == [7, 5, 3, 1]
+    assert walk(attempts, 1, 2, date_from="2026-01-03", date_to="2026-01-04") == [5, 4, 3]
+
+
+def test_export_matches_paging(attempts):
+    lines = "".join(history.export_ndjson(attempts, 1)).splitlines()
+    assert len(lines) == 7
+    assert '"id": 7' in lines[0]
+
+
+def test_pages_read_the_composite_index(attempts):
+    attempts.execute("CREATE INDEX idx_attempts_user_created ON attempts(user_id, created_at, id)")
+    where, params = history._where(1, before=("2026-01-04T10:00:00", 5))
+    plan = " ".join(
+        row[-1] for row in attempts.execute(
+            f"EXPLAIN QUERY PLAN SELECT {history.COLUMNS} FROM attempts WHERE {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT 3",
+            params,
+        )
+    )
+    assert "idx_attempts_user_created" in plan
+    # Rows come out of the index already ordered, with no sort step
+    assert "TEMP B-TREE" not in plan
+
+
+def test_export_streams_in_batches(attempts, monkeypatch):
+    monkeypatch.setattr(history, "EXPORT_FETCH_SIZE", 3)
+    chunks = list(history.export_ndjson(attempts, 1))
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import backends
+import inference
+import model_registry
+
+MODEL = "stub-model"
+
+
+class StubBackend:
+    """Echoes each clip back, prefixed with the decode prompt; "boom" fails its decode call."""
+
+    name = "stub"
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def decode(self, model, clips, options):
+        with self.lock:
+            self.calls.append((list(clips), dict(options)))
+        if "boom" in clips:
+            raise RuntimeError("decode failed")
+        return [f"{options.get('prompt', '')}:{clip}" for clip in clips]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    stub = StubBackend()
+    monkeypatch.setitem(backends.BACKENDS, backends.TRANSCRIBE_BACKEND, stub)
+    monkeypatch.setitem(model_registry._models, MODEL, object())
+    return stub
+
+
+def submit_all(q, requests):
+    """Transcribe every (clip, options) at once; returns each outcome in order."""
+
+    def one(request):
+        clip, options = request
+        try:
+            return q.transcribe(clip, **options)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(len(requests)) as pool:
+        return list(pool.map(one, requests))
+
+
+def test_clips_arriving_together_share_one_decode(backend):
+    # A long window, so the batch closes only once max_batch clips are in
+    q = inference.InferenceQueue(MODEL, window_ms=5000, max_batch=3)
+    assert submit_all(q, [("a", {}), ("b", {}), ("c", {})]) == [":a", ":b", ":c"]
+    assert len(backend.calls) == 1
+    assert sorted(backend.calls[0][0]) == ["a", "b", "c"]
+
+
+def test_batches_are_capped_at_max_batch(backend):
+    q = inference.InferenceQueue(MODEL, window_ms=50, max_batch=2)
+    results = submit_all(q, [(str(i), {}) for i in range(5)])
+    assert results == [f":{i}" for i in range(5)]
+    assert all(len(clips) <= 2 for clips, _ in backend.calls)
+    assert sum(len(clips) for clips, _ in backend.calls) == 5
+
+
+def test_only_clips_with_the_same_options_decode_together(backend):
+    q = inference.InferenceQueue(MODEL, window_ms=5000, max_batch=4)
+    fast = {"prompt": "hello", "temperature": 0.0}
+    results = submit_all(q, [("a", {}), ("b", fast), ("c", {}), ("d", dict(reversed(fast.items())))])
+    # Each caller gets the text for its own clip, decoded with its own options
+    assert results == [":a", "hello:b", ":c", "hello:d"]
+    assert sorted((sorted(clips), options.get("prompt")) for clips, options in backend.calls) == [
+        (["a", "c"], None),
+        (["b", "d"], "hello"),
+    ]
+
+
+def test_a_failed_decode_fails_only_its_own_group(backend):
+    q = inference.InferenceQueue(MODEL, window_ms=5000, max_batch=4)
+    fast = {"prompt": "hello"}
+    results = submit_all(q, [("boom", {}), ("a", {}), ("b", fast), ("c", fast)])
+    assert isinstance(results[0], RuntimeError)
+    assert isinstance(results[1], RuntimeError)
+    assert results[2:] == ["hello:b", "hello:c"]
+    # The queue thread survives the failure
+    assert submit_all(q, [(clip, {}) for clip in "defg"]) == [":d", ":e", ":f", ":g"]
+
+
+def test_stats_report_batch_sizes_and_waits(backend):
+    q = inference.InferenceQueue(MODEL, window_ms=5000, max_batch=3)
+    submit_all(q, [("a", {}), ("b", {}), ("c", {})])
+    stats = q.stats()
+    assert stats["model"] == MODEL
+    assert stats["served"] == 3
+    assert stats["batch_sizes"] == {3: 1}
+    assert stats["depth"] == 0
+    assert 0 <= stats["wait_ms"]["p50"] <= stats["wait_ms"]["p95"] <= stats["wait_ms"]["max"]
@@ -0,0 +1,97 @@
+import contextlib
+import io
+import threading
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def contexts():
+    entered = []
+
+    @contextlib.contextmanager
+    def app_context():
+        entered.append(threading.current_thread().name)
+        yield
+
+    return entered, app_context
+
+
+def test_job_runs_in_an_app_context_and_keeps_its_result(contexts):
+    entered, app_context = contexts
+    manager = jobs.JobManager(app_context, workers=1)
+    job = manager.submit("practice", lambda a, b: ({"sum": a + b}, 200), 2, 3)
+    assert job.wait(5)
+    assert job.to_dict() == {
+        "job_id": job.id, "kind": "practice", "status": "done", "status_code": 200, "result": {"sum": 5},
+    }
+    assert manager.get(job.id) is job
+    assert entered and entered[0].startswith("scoring-job")
+
+
+def test_error_status_and_exceptions_mark_the_job_failed(contexts):
+    manager = jobs.JobManager(contexts[1], workers=1)
+    rejected = manager.submit("practice", lambda: ({"error": "bad audio"}, 400))
+
+    def boom():
+        raise RuntimeError("worker crashed")
+
+    crashed = manager.submit("practice", boom)
+    assert rejected.wait(5) and crashed.wait(5)
+    assert (rejected.status, rejected.status_code) == ("failed", 400)
+    assert (crashed.status, crashed.status_code) == ("failed", 500)
+    assert crashed.result == {"error": "Processing failed: worker crashed"}
+
+
+def test_submissions_beyond_max_pending_are_rejected(contexts):
+    release = threading.Event()
+    manager = jobs.JobManager(contexts[1], workers=1, max_pending=2)
+    held = [manager.submit("practice", lambda: (release.wait(5), 200)) for _ in range(2)]
+    assert manager.pending() == 2
+    with pytest.raises(jobs.QueueFull):
+        manager.submit("practice", lambda: ({}, 200))
+    release.set()
+    assert all(job.wait(5) for job in held)
+    assert manager.submit("practice", lambda: ({}, 200)).wait(5)
+
+
+def test_finished_jobs_expire_after_the_ttl(contexts, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    manager = jobs.JobManager(contexts[1], workers=1, ttl=60)
+    job = manager.submit("practice", lambda: ({}, 200))
+    assert job.wait(5)
+    now[0] += 61
+    # Expiry happens as later jobs come in
+    manager.submit("practice", lambda: ({}, 200)).wait(5)
+    assert manager.get(job.id) is None
+
+
+def test_async_practice_commits_when_the_job_finishes(db_path, login, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app.audio_io, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(app.workers, "transcribe", lambda *args: ("hello", "HH AH0 L OW1"))
+    monkeypatch.setattr(app.workers, "text_phonemes", lambda text: ("HH", "AH0", "L", "OW1"))
+    monkeypatch.setattr(app, "_challenge_phonemes_checked", True)
+    client = app.create_app(warm=False).test_client()
+    user, headers = login(client)
+
+    response = client.post(
+        "/practice?async=1",
+        data={"target_text": "hello", "audio": (io.BytesIO(b"clip"), "a.webm")},
+        headers=headers,
+    )
+    assert response.status_code == 202
+    job_id = response.json["job_id"]
+
+    # The event stream blocks until the job is done, then sends its result
+    events = client.get(response.json["events_url"]).get_data(as_text=True)
+    assert "event: result" in events
+    status = client.get(f"/jobs/{job_id}").json
+    assert status["status"] == "done"
+    assert status["result"]["points_earned"] == 10
+    assert client.get("/leaderboard/rank", headers=headers).json["points"] == 10
+    assert client.get("/jobs/nope").status_code == 404
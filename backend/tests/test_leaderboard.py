@@ -0,0 +1,101 @@
+import pytest
+
+import leaderboard
+
+POINTS = {1: 50, 2: 80, 3: 50, 4: 10, 5: 80, 6: 0}
+
+
+@pytest.fixture
+def board():
+    return leaderboard.RankedBoard(POINTS.items())
+
+
+def walk(board, limit):
+    entries, cursor = board.page(None, limit)
+    while cursor is not None:
+        more, cursor = board.page(leaderboard.decode_cursor(cursor), limit)
+        entries += more
+    return entries
+
+
+def test_ties_share_a_competition_rank(board):
+    assert board.rank(2) == (1, 80)
+    assert board.rank(5) == (1, 80)
+    assert board.rank(1) == (3, 50)
+    assert board.rank(3) == (3, 50)
+    assert board.rank(4) == (5, 10)
+    assert board.rank(6) == (6, 0)
+    assert board.rank(42) is None
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 6, 100])
+def test_pages_walk_the_whole_board(board, limit):
+    assert walk(board, limit) == [(1, 2, 80), (1, 5, 80), (3, 1, 50), (3, 3, 50), (5, 4, 10), (6, 6, 0)]
+
+
+def test_last_page_has_no_cursor(board):
+    entries, cursor = board.page(None, 6)
+    assert len(entries) == 6
+    assert cursor is None
+
+
+def test_set_moves_one_user(board):
+    board.set(4, 90)
+    assert board.rank(4) == (1, 90)
+    assert board.rank(2) == (2, 80)
+    board.set(7, 50)
+    assert board.rank(7) == (4, 50)
+    assert len(board) == 7
+
+
+def test_reset_replaces_everything(board):
+    board.reset([(1, 5)])
+    assert len(board) == 1
+    assert board.rank(2) is None
+
+
+@pytest.fixture
+def points_db(memory_db, monkeypatch):
+    monkeypatch.setattr(leaderboard, "_boards", {})
+    memory_db.executescript(
+        """
+        CREATE TABLE users (id INTEGER PRIMARY KEY, points INTEGER);
+        CREATE TABLE weekly_points (
+            week TEXT NOT NULL, user_id INTEGER NOT NULL, points INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (week, user_id)
+        );
+        """
+    )
+    memory_db.executemany("INSERT INTO users VALUES (?, ?)", POINTS.items())
+    return memory_db
+
+
+def test_weekly_rollup_accumulates_per_week(points_db):
+    assert leaderboard.record_weekly(points_db, 1, 20, week="2026-W01") == ("2026-W01", 20)
+    assert leaderboard.record_weekly(points_db, 1, 15, week="2026-W01") == ("2026-W01", 35)
+    assert leaderboard.record_weekly(points_db, 1, 5, week="2026-W02") == ("2026-W02", 5)
+    assert leaderboard.get_board(points_db, "2026-W01").rank(1) == (1, 35)
+
+
+def test_awards_apply_to_loaded_boards_once(points_db):
+    week = leaderboard.week_key()
+    board = leaderboard.get_board(points_db, "all")
+    weekly = leaderboard.get_board(points_db, week)
+    assert weekly.rank(4) is None
+
+    points_db.execute("UPDATE users SET points = 95 WHERE id = 4")
+    weekly_total = leaderboard.record_weekly(points_db, 4, 85)
+    leaderboard.points_awarded(4, 95, weekly_total)
+    assert board.rank(4) == (1, 95)
+    assert weekly.rank(4) == (1, 85)
+
+    # Totals are absolute, so an award applied twice is not counted twice
+    leaderboard.points_awarded(4, 95, weekly_total)
+    assert board.rank(4) == (1, 95)
+    assert len(board) == len(POINTS)
+
+
+def test_cursor_round_trip():
+    assert leaderboard.decode_cursor(leaderboard.encode_cursor(80, 5)) == (80, 5)
+    with pytest.raises(ValueError):
+        leaderboard.decode_cursor("garbage")
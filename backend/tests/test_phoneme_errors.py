@@ -0,0 +1,110 @@
+import pytest
+
+import catalog
+import phoneme_errors
+
+CHALLENGES = [
+    # id, word, phonemes
+    (1, "think", "TH IH1 NG K"),
+    (2, "three", "TH R IY1"),
+    (3, "with", "W IH1 TH"),
+    (4, "rice", "R AY1 S"),
+    (5, "hello", "HH AH0 L OW1"),
+]
+
+
+def step(op, target, spoken=None):
+    return {"op": op, "target": target, "spoken": spoken}
+
+
+@pytest.fixture
+def snapshot():
+    return catalog.Snapshot([
+        {"id": cid, "word": word, "difficulty": "easy", "points": 50, "description": "", "phonemes": ph}
+        for cid, word, ph in CHALLENGES
+    ])
+
+
+@pytest.fixture
+def errors_db(memory_db):
+    memory_db.executescript(phoneme_errors.SCHEMA)
+    return memory_db
+
+
+def profile(db, user_id=1):
+    return {
+        row["phoneme"]: (row["errors"], row["attempts"])
+        for row in db.execute("SELECT * FROM user_phoneme_errors WHERE user_id = ?", (user_id,))
+    }
+
+
+def test_alignments_fold_into_per_phoneme_counts(errors_db):
+    alignment = [
+        step("substitution", "TH", "S"),
+        step("match", "IH1", "IH1"),
+        step("insertion", None, "Z"),
+        step("deletion", "NG"),
+        step("match", "K", "K"),
+    ]
+    phoneme_errors.record_alignment(errors_db, 1, alignment)
+    phoneme_errors.record_alignment(errors_db, 1, [step("match", "TH", "TH"), step("match", "IH0", "IH0")])
+    # Stress is dropped and insertions have no target phoneme to charge
+    assert profile(errors_db) == {"TH": (1, 2), "IH": (0, 2), "NG": (1, 1), "K": (0, 1)}
+
+
+def test_weak_phonemes_need_enough_attempts_and_are_damped(errors_db):
+    errors_db.executemany(
+        "INSERT INTO user_phoneme_errors VALUES (1, ?, ?, ?)",
+        [("TH", 20, 40), ("R", 2, 2), ("S", 3, 3), ("L", 0, 10), ("AY", 1, 10)],
+    )
+    weak = phoneme_errors.weak_phonemes(errors_db, 1, min_attempts=3)
+    assert [phoneme for phoneme, _, _ in weak] == ["S", "TH", "AY"]
+    assert weak[1] == ("TH", 20 / 42, 40)
+    assert phoneme_errors.weak_phonemes(errors_db, 1, limit=1, min_attempts=3)[0][0] == "S"
+
+
+def test_postings_list_the_densest_words_first(snapshot):
+    assert snapshot.postings["TH"] == [(1 / 3, 2), (1 / 3, 3), (1 / 4, 1)]
+    assert "IY1" not in snapshot.postings and "IY" in snapshot.postings
+
+
+def test_recommend_weights_error_rate_by_density(snapshot):
+    picks = phoneme_errors.recommend(snapshot, [("TH", 0.5, 10), ("R", 0.3, 10)], limit=3)
+    # three: .5/3 + .3/3, with: .5/3, think: .5/4, rice: .3/3
+    assert [(row["word"], targets) for row, targets in picks] == [
+        ("three", ["TH", "R"]),
+        ("with", ["TH"]),
+        ("think", ["TH"]),
+    ]
+
+
+def test_recommend_skips_excluded_and_caps_postings(snapshot):
+    weak = [("TH", 0.5, 10)]
+    assert [row["id"] for row, _ in phoneme_errors.recommend(snapshot, weak, exclude={2})] == [3, 1]
+    assert [row["id"] for row, _ in phoneme_errors.recommend(snapshot, weak, per_phoneme=1)] == [2]
+    assert phoneme_errors.recommend(snapshot, []) == []
+
+
+def test_recommended_route_targets_weak_phonemes(db_path, login):
+    import app
+
+    flask_app = app.create_app(warm=False)
+    client = flask_app.test_client()
+    user, headers = login(client)
+
+    # A new user gets easy challenges to start with
+    fresh = client.get("/challenges/recommended", headers=headers).json
+    assert fresh["weak_phonemes"] == []
+    assert {c["difficulty"] for c in fresh["challenges"]} == {"easy"}
+
+    with flask_app.app_context():
+        db = app.get_db()
+        db.execute("UPDATE challenges SET phonemes = 'TH R IY1' WHERE word = 'thank'")
+        db.execute("UPDATE challenges SET phonemes = 'W AO1 T ER0' WHERE word = 'water'")
+        phoneme_errors.record_alignment(db, user["id"], [step("substitution", "TH", "S")] * 4)
+        db.commit()
+        app.catalog.invalidate()
+
+    picked = client.get("/challenges/recommended?limit=5", headers=headers).json
+    assert picked["weak_phonemes"][0]["phoneme"] == "TH"
+    assert [(c["word"], c["targets"]) for c in picked["challenges"]] == [("thank", ["TH"])]
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import phoneme_errors
+import rescore
+import user_stats
+
+SCHEMA = """
+CREATE TABLE challenges (id INTEGER PRIMARY KEY, word TEXT, difficulty TEXT, points INTEGER);
+CREATE TABLE attempts (
+    id INTEGER PRIMARY KEY, user_id INTEGER, target_text TEXT, transcript TEXT,
+    accuracy REAL, points_earned INTEGER, created_at TEXT, challenge_id INTEGER
+);
+CREATE TABLE user_challenges (
+    id INTEGER PRIMARY KEY, user_id INTEGER, challenge_id INTEGER, completed BOOLEAN,
+    accuracy REAL, points_earned INTEGER, completed_at TEXT
+);
+"""
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Re-aligning attempts needs G2P; only the user_challenges/user_stats side is under test
+    monkeypatch.setattr(phoneme_errors, "backfill", lambda db: 0)
+    conn = sqlite3.connect(str(tmp_path / "rescore.db"))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO challenges VALUES (1, 'hello', 'easy', 50)")
+    # Three attempts at one challenge, each with its own user_challenges row
+    for attempt_id, accuracy in ((1, 90.0), (2, 50.0), (3, 85.0)):
+        created_at = f"2026-01-0{attempt_id}T10:00:00"
+        conn.execute(
+            "INSERT INTO attempts VALUES (?, 1, 'hello', 'hello', ?, 0, ?, 1)", (attempt_id, accuracy, created_at)
+        )
+        conn.execute(
+            "INSERT INTO user_challenges (user_id, challenge_id, completed, accuracy, points_earned, completed_at) "
+            "VALUES (1, 1, 1, ?, 0, ?)",
+            (accuracy, created_at),
+        )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_refresh_keeps_each_challenge_row_paired_with_its_attempt(db):
+    db.execute("UPDATE attempts SET accuracy = 40.0 WHERE id = 1")
+    db.commit()
+    rescore.refresh_derived(db)
+    rows = [row[0] for row in db.execute("SELECT accuracy FROM user_challenges ORDER BY id")]
+    assert rows == [40.0, 50.0, 85.0]
+    assert user_stats.get_profile(db, 1)["challengesWon"]["easy"] == 1
+
+
+def test_refresh_without_score_changes_is_a_no_op(db):
+    rescore.refresh_derived(db)
+    rows = [row[0] for row in db.execute("SELECT accuracy FROM user_challenges ORDER BY id")]
+    assert rows == [90.0, 50.0, 85.0]
+    assert user_stats.get_profile(db, 1)["challengesWon"]["easy"] == 2
+
+
+def test_finished_job_skips_the_rebuild(db, tmp_path, monkeypatch):
+    db.execute(
+        "CREATE TABLE rescore_progress (job TEXT PRIMARY KEY, last_id INTEGER NOT NULL, rows INTEGER NOT NULL, updated_at TEXT)"
+    )
+    db.execute("INSERT INTO rescore_progress VALUES ('default', 3, 3, NULL)")
+    db.commit()
+    monkeypatch.setattr(rescore, "refresh_derived", lambda db: pytest.fail("rebuilt after an empty run"))
+    processed, _ = rescore.rescore(str(tmp_path / "rescore.db"), workers=1)
+    assert processed == 0
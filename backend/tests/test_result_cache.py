@@ -0,0 +1,87 @@
+import pytest
+
+import result_cache
+
+VALUE = {"transcript": "hello", "phonemes": "HH AH0 L OW1"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache_db(memory_db):
+    memory_db.execute(
+        "CREATE TABLE result_cache (key TEXT PRIMARY KEY, transcript TEXT, phonemes TEXT, created_at REAL)"
+    )
+    return memory_db
+
+
+def test_key_covers_content_model_options_and_backend():
+    key = result_cache.ResultCache.key_for(b"clip", "base", {"language": "en", "temperature": 0.0}, "torch")
+    assert key == result_cache.ResultCache.key_for(b"clip", "base", {"temperature": 0.0, "language": "en"}, "torch")
+    assert len({
+        key,
+        result_cache.ResultCache.key_for(b"clip2", "base", {"language": "en", "temperature": 0.0}, "torch"),
+        result_cache.ResultCache.key_for(b"clip", "small", {"language": "en", "temperature": 0.0}, "torch"),
+        result_cache.ResultCache.key_for(b"clip", "base", {}, "torch"),
+        result_cache.ResultCache.key_for(b"clip", "base", {"language": "en", "temperature": 0.0}, "ctranslate2"),
+    }) == 5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = result_cache.ResultCache(max_entries=2, disk=False)
+    cache.put("a", VALUE)
+    cache.put("b", VALUE)
+    cache.get("a")
+    cache.put("c", VALUE)
+    assert cache.get("b") is None
+    assert cache.get("a") == VALUE
+    assert cache.get("c") == VALUE
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1}
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = result_cache.ResultCache(ttl=60, disk=False)
+    cache.put("a", VALUE)
+    clock[0] += 60
+    assert cache.get("a") == VALUE
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_is_shared_and_honours_the_ttl(cache_db, clock):
+    result_cache.ResultCache(ttl=60, disk=True).put("a", VALUE, cache_db)
+    # Another worker's cache starts empty but finds the row on disk
+    other = result_cache.ResultCache(ttl=60, disk=True)
+    assert other.get("a", cache_db) == VALUE
+    assert other.stats()["entries"] == 1
+
+    clock[0] += 61
+    assert result_cache.ResultCache(ttl=60, disk=True).get("a", cache_db) is None
+
+
+def test_a_repeated_upload_skips_transcription(db_path, monkeypatch):
+    import app
+
+    calls = []
+    monkeypatch.setattr(result_cache, "cache", result_cache.ResultCache(disk=False))
+    monkeypatch.setattr(app.workers, "transcribe", lambda *args: calls.append(args) or ("hello", "HH AH0 L OW1"))
+    flask_app = app.create_app(warm=False)
+    with flask_app.app_context():
+        assert app._transcribe_upload(b"clip", "practice") == ("hello", ("HH", "AH0", "L", "OW1"), False)
+        assert app._transcribe_upload(b"clip", "practice") == ("hello", ("HH", "AH0", "L", "OW1"), True)
+    assert len(calls) == 1
+
+
+def test_cache_hit_points_policy(monkeypatch):
+    import app
+
+    assert app._points_for(40, cached=True) == 40
+    monkeypatch.setattr(result_cache, "CACHE_HIT_POINTS", "none")
+    assert app._points_for(40, cached=True) == 0
+    assert app._points_for(40, cached=False) == 40
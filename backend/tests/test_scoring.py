@@ -0,0 +1,84 @@
+import pytest
+
+import scoring
+
+HELLO = ["HH", "AH0", "L", "OW1"]
+
+
+def ops(result):
+    return [step["op"] for step in result.alignment]
+
+
+def test_align_identical_is_all_matches():
+    result = scoring.align(HELLO, HELLO)
+    assert result.accuracy == 100.0
+    assert result.distance == 0
+    assert ops(result) == ["match"] * 4
+
+
+def test_align_reports_each_edit():
+    # HH -> (dropped), AH0 -> EH0, extra Z at the end
+    result = scoring.align(HELLO, ["EH0", "L", "OW1", "Z"])
+    assert result.distance == 3
+    assert ops(result) == ["deletion", "substitution", "match", "match", "insertion"]
+    assert result.alignment[0] == {"op": "deletion", "target": "HH", "spoken": None}
+    assert result.alignment[-1] == {"op": "insertion", "target": None, "spoken": "Z"}
+    assert result.accuracy == 25.0
+
+
+def test_align_drops_word_breaks_and_punctuation():
+    result = scoring.align(["HH", " ", "AY1", "!"], ["HH", "AY1"])
+    assert result.accuracy == 100.0
+    assert len(result.alignment) == 2
+
+
+def test_align_stress():
+    assert scoring.align(["AH0"], ["AH1"], ignore_stress=False).accuracy == 0.0
+    assert scoring.align(["AH0"], ["AH1"], ignore_stress=True).accuracy == 100.0
+
+
+def test_align_empty_sides():
+    assert scoring.align([], []).accuracy == 100.0
+    assert ops(scoring.align(HELLO, [])) == ["deletion"] * 4
+    assert scoring.align([], ["AH0"]).accuracy == 0.0
+
+
+@pytest.mark.parametrize("ignore_stress", [False, True])
+def test_score_batch_matches_align(ignore_stress):
+    pairs = [
+        (HELLO, HELLO),
+        (HELLO, ["EH0", "L", "OW1", "Z"]),
+        (HELLO, []),
+        ([], []),
+        (["W", "ER1", "L", "D"], ["W", "ER0", "D"]),
+        (["TH", "AE1", "NG", "K"], ["T", "AE1", "NG", "K", "S"]),
+        (HELLO * 5, HELLO * 4),
+    ]
+    expected = [scoring.align(t, s, ignore_stress).accuracy for t, s in pairs]
+    assert list(scoring.score_batch(pairs, ignore_stress)) == expected
+
+
+def test_score_batch_across_chunks(monkeypatch):
+    monkeypatch.setattr(scoring, "BATCH_CHUNK", 2)
+    pairs = [(HELLO[:n], HELLO[: n - 1]) for n in range(1, 5)] + [(HELLO, HELLO)]
+    expected = [scoring.align(t, s).accuracy for t, s in pairs]
+    assert list(scoring.score_batch(pairs)) == expected
+
+
+def test_unknown_scorer():
+    with pytest.raises(ValueError):
+        scoring.score(HELLO, HELLO, scorer="nope")
+
+
+def test_multi_letter_symbols_are_compared_whole():
+    # AH0 vs AA0 is one substituted phoneme, not two matching characters out of three
+    assert scoring.align(["AH0"], ["AA0"]).accuracy == 0.0
+    assert scoring.score(["AH0"], ["AA0"], scorer="character").accuracy == 66.67
+
+
+def test_score_uses_the_configured_scorer(monkeypatch):
+    assert scoring.score(HELLO, ["HH", "AH0"]).alignment is not None
+    monkeypatch.setattr(scoring, "SCORER", "character")
+    result = scoring.score(HELLO, ["HH", "AH0"])
+    assert result.alignment is None
+    assert result.accuracy == scoring.phoneme_accuracy("HHAH0LOW1", "HHAH0")
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+import audio
+import jobs
+import streaming
+import workers
+
+RATE = audio.SAMPLE_RATE
+
+
+class PassThroughDecoder:
+    """Stands in for the ffmpeg StreamDecoder: chunks are already float32 PCM."""
+
+    def __init__(self, on_samples):
+        self.on_samples = on_samples
+        self.aborted = False
+
+    def feed(self, chunk):
+        self.on_samples(np.frombuffer(chunk, np.float32))
+
+    def close(self):
+        pass
+
+    def abort(self):
+        self.aborted = True
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32).tobytes()
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), np.float32).tobytes()
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Transcriptions run, with the number of samples each one saw."""
+    calls = []
+    monkeypatch.setattr(audio, "StreamDecoder", PassThroughDecoder)
+
+    def transcribe_decoded(samples, route, options):
+        calls.append(len(samples))
+        return "hello", "HH AH0 L OW1"
+
+    monkeypatch.setattr(workers, "transcribe_decoded", transcribe_decoded)
+    return calls
+
+
+def test_ring_buffer_keeps_the_latest_samples_in_order():
+    ring = streaming.RingBuffer(5)
+    ring.append(np.arange(3, dtype=np.float32))
+    assert ring.view().tolist() == [0, 1, 2]
+    ring.append(np.arange(3, 7, dtype=np.float32))
+    assert ring.view().tolist() == [2, 3, 4, 5, 6]
+    ring.append(np.arange(7, 20, dtype=np.float32))
+    assert ring.view().tolist() == [15, 16, 17, 18, 19]
+    assert ring.total == 20
+
+
+def test_transcription_starts_when_speech_ends_and_is_reused(decoded):
+    session = streaming.StreamSession("practice", "practice", (1, "hello"))
+    session.feed(silence(0.3) + tone(1.0))
+    assert not session.speech_ended
+    session.feed(silence(streaming.END_SILENCE_MS / 1000 + 0.1))
+    assert session.speech_ended
+    # Trailing silence after the early start doesn't need a second pass
+    session.feed(silence(0.2))
+    assert session.finish() == ("hello", ("HH", "AH0", "L", "OW1"), False)
+    assert len(decoded) == 1
+
+
+def test_speech_after_the_early_start_is_transcribed_again(decoded):
+    session = streaming.StreamSession("practice", "practice", (1, "hello"))
+    session.feed(tone(1.0) + silence(streaming.END_SILENCE_MS / 1000 + 0.1))
+    assert session.speech_ended
+    session._early[1].result()
+    session.feed(tone(0.5))
+    assert not session.speech_ended
+    session.finish()
+    assert len(decoded) == 2
+    assert decoded[1] > decoded[0]
+
+
+def test_vad_history_is_bounded_by_the_buffer(decoded, monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_MAX_SECONDS", 1)
+    session = streaming.StreamSession("practice", "practice", (1, "hello"))
+    for _ in range(4):
+        session.feed(tone(0.5))
+    assert len(session._rms) == session._rms.maxlen == RATE // session._frame
+    assert len(session._buffer.view()) == RATE
+
+
+def test_store_limits_and_expires_sessions(decoded, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(streaming.time, "time", lambda: now[0])
+    store = streaming.SessionStore(max_sessions=2, ttl=60)
+    first = store.create("practice", "practice", (1, "hello"))
+    store.create("practice", "practice", (1, "world"))
+    with pytest.raises(jobs.QueueFull):
+        store.create("practice", "practice", (1, "again"))
+
+    now[0] += 61
+    assert store.get(first.id) is None
+    assert first._decoder.aborted
+    assert store.create("practice", "practice", (1, "again"))
+
+
+def test_streamed_practice_is_scored_like_an_upload(db_path, login, decoded, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app.audio_io, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(app.workers, "text_phonemes", lambda text: ("HH", "AH0", "L", "OW1"))
+    monkeypatch.setattr(app, "_challenge_phonemes_checked", True)
+    client = app.create_app(warm=False).test_client()
+    _, headers = login(client)
+
+    started = client.post("/stream", json={"target_text": "hello"}, headers=headers)
+    assert started.status_code == 201
+    chunk = client.post(started.json["chunk_url"], data=tone(1.0) + silence(1.0))
+    assert chunk.json == {"received": len(tone(1.0) + silence(1.0)), "speech_ended": True}
+
+    finished = client.post(started.json["finish_url"])
+    assert finished.status_code == 200
+    assert finished.json["accuracy"] == 100.0
+    assert client.get("/leaderboard/rank", headers=headers).json["points"] == finished.json["new_points"]
+    assert client.post(started.json["finish_url"]).status_code == 404
@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+import user_stats
+
+ATTEMPTS = [
+    # (accuracy, created_at, difficulty)
+    (60.0, "2026-03-01T09:00:00", None),
+    (85.0, "2026-03-01T18:00:00", "easy"),
+    (92.0, "2026-03-02T08:00:00", "hard"),
+    (70.0, "2026-03-04T08:00:00", "medium"),
+    (81.0, "2026-03-05T23:59:00", "medium"),
+]
+
+
+@pytest.fixture
+def stats_db(memory_db):
+    memory_db.executescript(
+        """
+        CREATE TABLE challenges (id INTEGER PRIMARY KEY, difficulty TEXT);
+        CREATE TABLE attempts (id INTEGER PRIMARY KEY, user_id INTEGER, accuracy REAL, created_at TEXT);
+        CREATE TABLE user_challenges (id INTEGER PRIMARY KEY, user_id INTEGER, challenge_id INTEGER, accuracy REAL);
+        INSERT INTO challenges VALUES (1, 'easy'), (2, 'medium'), (3, 'hard');
+        """
+    )
+    memory_db.executescript(user_stats.SCHEMA)
+    return memory_db
+
+
+def record_all(db, attempts=ATTEMPTS, user_id=1):
+    for accuracy, created_at, difficulty in attempts:
+        user_stats.record_attempt(db, user_id, accuracy, created_at, difficulty)
+
+
+def stored(db, user_id=1):
+    return dict(db.execute("SELECT * FROM user_stats WHERE user_id = ?", (user_id,)).fetchone())
+
+
+def test_record_attempt_keeps_counts_best_score_and_wins(stats_db):
+    record_all(stats_db)
+    row = stored(stats_db)
+    assert row["total_sessions"] == 5
+    assert row["best_score"] == 92.0
+    assert (row["easy_won"], row["medium_won"], row["hard_won"]) == (1, 1, 1)
+
+
+@pytest.mark.parametrize("days, streak", [
+    (["2026-03-01", "2026-03-01"], 1),
+    (["2026-03-01", "2026-03-02", "2026-03-03"], 3),
+    (["2026-03-01", "2026-03-02", "2026-03-04"], 1),
+    (["2026-02-28", "2026-03-01"], 2),
+    (["2025-12-31", "2026-01-01", "2026-01-01", "2026-01-02"], 3),
+])
+def test_streak_counts_consecutive_days(stats_db, days, streak):
+    record_all(stats_db, [(50.0, f"{day}T12:00:00", None) for day in days])
+    assert stored(stats_db)["streak"] == streak
+    assert user_stats._trailing_streak(sorted(set(days))) == streak
+
+
+def test_streak_lapses_after_a_missed_day():
+    assert user_stats.current_streak(4, "2026-03-05", today=date(2026, 3, 5)) == 4
+    assert user_stats.current_streak(4, "2026-03-05", today=date(2026, 3, 6)) == 4
+    assert user_stats.current_streak(4, "2026-03-05", today=date(2026, 3, 7)) == 0
+    assert user_stats.current_streak(0, None) == 0
+
+
+def test_profile_for_a_user_without_attempts(stats_db):
+    assert user_stats.get_profile(stats_db, 42) == {
+        "streaks": 0,
+        "totalSessions": 0,
+        "bestScore": 0,
+        "challengesWon": {"easy": 0, "medium": 0, "hard": 0},
+    }
+
+
+def test_backfill_matches_incremental_updates(stats_db):
+    challenge_ids = {"easy": 1, "medium": 2, "hard": 3}
+    for accuracy, created_at, difficulty in ATTEMPTS:
+        stats_db.execute(
+            "INSERT INTO attempts (user_id, accuracy, created_at) VALUES (1, ?, ?)", (accuracy, created_at)
+        )
+        if difficulty:
+            stats_db.execute(
+                "INSERT INTO user_challenges (user_id, challenge_id, accuracy) VALUES (1, ?, ?)",
+                (challenge_ids[difficulty], accuracy),
+            )
+    assert user_stats.backfill(stats_db) == 1
+    backfilled = stored(stats_db)
+
+    stats_db.execute("DELETE FROM user_stats")
+    record_all(stats_db)
+    assert stored(stats_db) == backfilled
@@ -0,0 +1,91 @@
+"""Named timing spans for the scoring pipeline.
+
+    with timing.span("ffmpeg"):
+        samples = audio_io.decode_audio(data)
+
+Each finished span is handed to every registered sink as ``sink(name,
+seconds)``. With no sinks registered a span costs two perf_counter() calls
+and a thread-local lookup.
+Sinks are per process; scoring workers capture() the spans of each task and
+send them back with the result, where record() replays them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_local = threading.local()
+
+
+def add_sink(sink):
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def record(name, seconds):
+    for sink in _sinks:
+        sink(name, seconds)
+    captured = getattr(_local, "captured", None)
+    if captured is not None:
+        captured.append((name, seconds))
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def capture():
+    """Collect the (name, seconds) of every span finished on this thread."""
+    _local.captured = spans = []
+    try:
+        yield spans
+    finally:
+        _local.captured = None
+
+
+class StageTimes:
+    """Sink that keeps every duration per stage, for benchmarks and tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+
+    def __call__(self, name, seconds):
+        with self._lock:
+            self._durations.setdefault(name, []).append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+
+    def summary(self):
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+
+        def pct(values, p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 3)
+
+        return {
+            name: {
+                "count": len(values),
+                "total_ms": round(sum(values) * 1000, 3),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": pct(values, 0.5),
+                "p95_ms": pct(values, 0.95),
+                "max_ms": pct(values, 1.0),
+            }
+            for name, values in sorted(durations.items())
+        }
@@ -0,0 +1,158 @@
+"""Per-user profile rollup, maintained as attempts are recorded.
+
+Backfill from existing attempts (from backend/):
+
+    python user_stats.py --backfill [--db pronunciation.db]
+"""
+import argparse
+import sqlite3
+from datetime import date, datetime
+
+import db as db_layer
+
+DIFFICULTIES = ("easy", "medium", "hard")
+# A challenge attempt at or above this accuracy counts as a win
+WIN_ACCURACY = 80
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_sessions INTEGER NOT NULL DEFAULT 0,
+    best_score REAL NOT NULL DEFAULT 0,
+    easy_won INTEGER NOT NULL DEFAULT 0,
+    medium_won INTEGER NOT NULL DEFAULT 0,
+    hard_won INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0,
+    last_practice_date TEXT,
+    FOREIGN KEY(user_id) REFERENCES users(id)
+);
+"""
+
+
+def record_attempt(cur, user_id, accuracy, created_at, difficulty=None):
+    """Fold one attempt into user_stats; call inside the attempt's transaction."""
+    day = created_at[:10]
+    won = difficulty in DIFFICULTIES and accuracy >= WIN_ACCURACY
+    wins = [int(won and difficulty == d) for d in DIFFICULTIES]
+    # In DO UPDATE, bare column names are the stored row and excluded.* the new one
+    cur.execute(
+        """
+        INSERT INTO user_stats
+            (user_id, total_sessions, best_score, easy_won, medium_won, hard_won, streak, last_practice_date)
+        VALUES (?, 1, ?, ?, ?, ?, 1, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_sessions = total_sessions + 1,
+            best_score = MAX(best_score, excluded.best_score),
+            easy_won = easy_won + excluded.easy_won,
+            medium_won = medium_won + excluded.medium_won,
+            hard_won = hard_won + excluded.hard_won,
+            streak = CASE
+                WHEN last_practice_date = excluded.last_practice_date THEN streak
+                WHEN last_practice_date = DATE(excluded.last_practice_date, '-1 day') THEN streak + 1
+                ELSE 1
+            END,
+            last_practice_date = excluded.last_practice_date
+        """,
+        (user_id, accuracy, *wins, day),
+    )
+
+
+def current_streak(streak, last_practice_date, today=None):
+    """A streak only counts while the last practice day is today or yesterday."""
+    if not last_practice_date:
+        return 0
+    today = today or datetime.utcnow().date()
+    last = date.fromisoformat(last_practice_date)
+    return streak if (today - last).days <= 1 else 0
+
+
+def get_profile(db, user_id):
+    row = db.execute("SELECT * FROM user_stats WHERE user_id = ?", (user_id,)).fetchone()
+    if row is None:
+        return {
+            "streaks": 0,
+            "totalSessions": 0,
+            "bestScore": 0,
+            "challengesWon": {d: 0 for d in DIFFICULTIES},
+        }
+    return {
+        "streaks": current_streak(row["streak"], row["last_practice_date"]),
+        "totalSessions": row["total_sessions"],
+        "bestScore": int(row["best_score"]) if row["best_score"] else 0,
+        "challengesWon": {d: row[f"{d}_won"] for d in DIFFICULTIES},
+    }
+
+
+def _trailing_streak(days):
+    """Length of the run of consecutive days ending at the last one (days sorted)."""
+    streak = 0
+    previous = None
+    for day in days:
+        d = date.fromisoformat(day)
+        streak = streak + 1 if previous is not None and (d - previous).days == 1 else 1
+        previous = d
+    return streak
+
+
+def backfill(db):
+    """Rebuild user_stats from attempts and user_challenges."""
+    db.executescript(SCHEMA)
+    stats = {}
+    for row in db.execute(
+        "SELECT user_id, COUNT(*), MAX(accuracy) FROM attempts WHERE user_id IS NOT NULL GROUP BY user_id"
+    ):
+        stats[row[0]] = {"total": row[1], "best": row[2] or 0, "days": [], "wins": dict.fromkeys(DIFFICULTIES, 0)}
+
+    for user_id, day in db.execute(
+        "SELECT DISTINCT user_id, DATE(created_at) AS day FROM attempts "
+        "WHERE user_id IS NOT NULL AND created_at IS NOT NULL ORDER BY user_id, day"
+    ):
+        if user_id in stats and day:
+            stats[user_id]["days"].append(day)
+
+    for user_id, difficulty, won in db.execute(
+        """
+        SELECT uc.user_id, c.difficulty, COUNT(*)
+        FROM user_challenges uc
+        JOIN challenges c ON uc.challenge_id = c.id
+        WHERE uc.accuracy >= ?
+        GROUP BY uc.user_id, c.difficulty
+        """,
+        (WIN_ACCURACY,),
+    ):
+        if user_id in stats and difficulty in DIFFICULTIES:
+            stats[user_id]["wins"][difficulty] = won
+
+    rows = [
+        (
+            user_id,
+            s["total"],
+            s["best"],
+            s["wins"]["easy"],
+            s["wins"]["medium"],
+            s["wins"]["hard"],
+            _trailing_streak(s["days"]),
+            s["days"][-1] if s["days"] else None,
+        )
+        for user_id, s in stats.items()
+    ]
+    with db:
+        db.execute("DELETE FROM user_stats")
+        db.executemany("INSERT INTO user_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the user_stats rollup table.")
+    parser.add_argument("--db", default=db_layer.DB_PATH)
+    parser.add_argument("--backfill", action="store_true", help="rebuild user_stats from attempts")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do; pass --backfill")
+    db = sqlite3.connect(args.db)
+    print(f"Backfilled stats for {backfill(db)} users")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
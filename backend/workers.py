@@ -0,0 +1,412 @@
+"""Scoring worker processes.
+
+With SCORING_WORKERS=N the CPU-heavy half of scoring (ffmpeg decode, Whisper
+and G2P) runs in N separate processes, each holding its own model and G2P
+engine with a pinned torch thread count. The web process only sends the
+upload down a pipe and waits for the transcript, so CRUD requests stop
+competing with inference for the GIL. SCORING_WORKERS=0 (the default) keeps
+everything in-process.
+"""
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from multiprocessing import connection as mp_connection
+
+import audio as audio_io
+import backends
+import inference
+import model_registry
+import phonemes
+import timing
+
+SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", "0"))
+# torch intra-op threads per worker (falls back to TORCH_NUM_THREADS); by
+# default the cores are split between the workers
+WORKER_TORCH_THREADS = (
+    int(os.environ.get("SCORING_WORKER_THREADS", "0"))
+    or backends.TORCH_NUM_THREADS
+    or max(1, (os.cpu_count() or 1) // max(1, SCORING_WORKERS))
+)
+# Tasks one worker runs at once; more than one lets its InferenceQueue batch them
+WORKER_CONCURRENCY = int(os.environ.get("SCORING_WORKER_CONCURRENCY", str(inference.MAX_BATCH_SIZE)))
+# A worker is replaced once it grows past this (0 = no limit) or has served this many tasks
+WORKER_MAX_RSS_MB = int(os.environ.get("SCORING_WORKER_MAX_RSS_MB", "0"))
+WORKER_MAX_TASKS = int(os.environ.get("SCORING_WORKER_MAX_TASKS", "0"))
+TASK_TIMEOUT = float(os.environ.get("SCORING_TASK_TIMEOUT", "120"))
+# A worker that dies sooner than this after starting is restarted with backoff
+MIN_UPTIME_SECONDS = 10
+
+log = logging.getLogger(__name__)
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def transcribe_clip(audio_bytes, route, decode_options):
+    """Decode, trim, transcribe and G2P one upload.
+
+    Returns ``(transcript, spoken phonemes in challenges.phonemes form)``.
+    """
+    log.debug("Decoding audio with FFmpeg.")
+    with timing.span("ffmpeg"):
+        samples = audio_io.decode_audio(audio_bytes)
+    log.debug("Audio decoding completed.")
+    return transcribe_samples(samples, route, decode_options)
+
+
+def transcribe_samples(samples, route, decode_options):
+    """transcribe_clip() for audio that is already decoded (16 kHz float32)."""
+    # Trim silence and reject empty clips before they reach the model
+    with timing.span("vad"):
+        samples = audio_io.trim_silence(samples)
+
+    log.debug("Transcribing audio.")
+    with timing.span("transcribe"):
+        transcript = inference.transcribe(samples, route, **decode_options).strip()
+    log.debug("Transcription completed: '%s'", transcript)
+
+    if not transcript:
+        raise ValueError("Could not transcribe audio. Please try again.")
+    with timing.span("g2p"):
+        spoken = phonemes.phonemes(transcript)
+    return transcript, phonemes.to_column(spoken)
+
+
+_TASKS = {
+    "transcribe": transcribe_clip,
+    "transcribe_samples": transcribe_samples,
+    "phonemes": phonemes.phonemes,
+}
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # Peak rather than current RSS, in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker_main(conn, torch_threads, concurrency, max_rss_mb, max_tasks):
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s[%(process)d]: %(message)s",
+    )
+    # Thread pools have to be sized before torch is first imported
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+    backends.configure_threads(torch_threads)
+    model_registry.warm_up()
+    phonemes.warm_up()
+
+    send_lock = threading.Lock()
+    served = itertools.count(1)
+    retiring = threading.Event()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def run(task_id, name, args):
+        # Stage timings travel back with the result so the web process's
+        # metrics include them
+        with timing.capture() as spans:
+            try:
+                outcome = ("ok", task_id, _TASKS[name](*args))
+            except Exception as e:
+                outcome = ("error", task_id, e)
+        rss = _rss_mb()
+        try:
+            send(outcome + (rss, spans))
+        except Exception:
+            # Result or exception didn't pickle; report it as plain text
+            send(("error", task_id, WorkerError(str(outcome[2])), rss, spans))
+        count = next(served)
+        if retiring.is_set():
+            return
+        if (max_rss_mb and rss > max_rss_mb) or (max_tasks and count >= max_tasks):
+            retiring.set()
+            send(("retire", f"{rss:.0f} MB resident after {count} tasks"))
+
+    send(("ready", os.getpid()))
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scoring-task")
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        executor.submit(run, *message)
+    # Finish whatever was already handed to us before exiting
+    executor.shutdown(wait=True)
+
+
+class _Worker:
+    def __init__(self, ctx, slot):
+        self.slot = slot
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, WORKER_TORCH_THREADS, WORKER_CONCURRENCY, WORKER_MAX_RSS_MB, WORKER_MAX_TASKS),
+            name=f"scoring-worker-{slot}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.started = time.time()
+        self.ready = False
+        self.draining = False
+        self.in_flight = {}
+        self.served = 0
+        self.rss_mb = None
+        self.send_lock = threading.Lock()
+
+    def stop(self):
+        try:
+            with self.send_lock:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+
+    def stats(self):
+        return {
+            "slot": self.slot,
+            "pid": self.process.pid,
+            "ready": self.ready,
+            "draining": self.draining,
+            "in_flight": len(self.in_flight),
+            "served": self.served,
+            "rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+class WorkerPool:
+    """Fixed number of scoring processes fed over one pipe each.
+
+    Each task goes to the live worker with the fewest tasks in flight. A
+    worker that crashes fails its in-flight tasks and is restarted; one that
+    asks to retire (memory or task limit) is replaced immediately and exits
+    once its current tasks are done.
+    """
+
+    def __init__(self, size=SCORING_WORKERS):
+        # spawn: children must not inherit the web process's threads and sockets
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Condition()
+        self._ids = itertools.count()
+        self._workers = [_Worker(self._ctx, slot) for slot in range(size)]
+        self._retired = []
+        self._failures = {}
+        self._restarts = 0
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name="scoring-workers", daemon=True)
+        self._collector.start()
+
+    def call(self, task, *args, timeout=TASK_TIMEOUT):
+        """Run ``task`` (a name from _TASKS) in a worker and return its result."""
+        future = Future()
+        task_id = next(self._ids)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                candidates = [w for w in self._workers if not w.draining]
+                remaining = deadline - time.monotonic()
+                if candidates or self._closed or remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            if not candidates:
+                raise WorkerError("No scoring workers available")
+            worker = min(candidates, key=lambda w: (not w.ready, len(w.in_flight)))
+            worker.in_flight[task_id] = future
+        try:
+            with worker.send_lock:
+                worker.conn.send((task_id, task, args))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                worker.in_flight.pop(task_id, None)
+            raise WorkerError(f"Could not reach scoring worker: {e}")
+        try:
+            return future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeout:
+            raise WorkerError(f"Scoring timed out after {timeout:.0f}s")
+
+    def recycle(self):
+        """Replace every worker, e.g. to pick up new model settings."""
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            self._retire(worker, "recycle requested")
+        return len(workers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": [w.stats() for w in self._workers],
+                "retiring": len(self._retired),
+                "restarts": self._restarts,
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = self._workers + self._retired
+            self._lock.notify_all()
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def _collect(self):
+        while not self._closed:
+            with self._lock:
+                conns = {w.conn: w for w in self._workers + self._retired}
+            if not conns:
+                time.sleep(0.1)
+                continue
+            # Short timeout so replacement workers get picked up
+            for conn in mp_connection.wait(list(conns), timeout=0.5):
+                worker = conns[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._exited(worker)
+                    continue
+                self._handle(worker, message)
+
+    def _handle(self, worker, message):
+        kind = message[0]
+        if kind == "ready":
+            with self._lock:
+                worker.ready = True
+                self._failures.pop(worker.slot, None)
+                self._lock.notify_all()
+            log.info("Scoring worker %d ready (pid %d)", worker.slot, message[1])
+        elif kind in ("ok", "error"):
+            _, task_id, value, rss_mb, spans = message
+            with self._lock:
+                future = worker.in_flight.pop(task_id, None)
+                worker.served += 1
+                worker.rss_mb = rss_mb
+            for name, seconds in spans:
+                timing.record(name, seconds)
+            if future is None:
+                return
+            if kind == "ok":
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        elif kind == "retire":
+            self._retire(worker, message[1])
+
+    def _retire(self, worker, reason):
+        with self._lock:
+            if worker not in self._workers or self._closed:
+                return
+            log.info("Replacing scoring worker %d (pid %d): %s", worker.slot, worker.process.pid, reason)
+            worker.draining = True
+            self._workers[self._workers.index(worker)] = _Worker(self._ctx, worker.slot)
+            self._retired.append(worker)
+            self._restarts += 1
+            self._lock.notify_all()
+        worker.stop()
+
+    def _exited(self, worker):
+        worker.process.join(timeout=1)
+        with self._lock:
+            crashed = worker in self._workers
+            if crashed:
+                self._workers.remove(worker)
+            else:
+                self._retired.remove(worker)
+            lost, worker.in_flight = worker.in_flight, {}
+        worker.conn.close()
+
+        error = WorkerError(
+            f"Scoring worker {worker.slot} exited (code {worker.process.exitcode}) while scoring"
+        )
+        for future in lost.values():
+            future.set_exception(error)
+        if not crashed or self._closed:
+            return
+
+        # Back off when a worker keeps dying during start-up (e.g. the model won't load)
+        delay = 0
+        if time.time() - worker.started < MIN_UPTIME_SECONDS:
+            failures = self._failures[worker.slot] = self._failures.get(worker.slot, 0) + 1
+            delay = min(30, 2 ** failures)
+        log.warning(
+            "Scoring worker %d died (code %s); restarting in %ds", worker.slot, worker.process.exitcode, delay
+        )
+        threading.Timer(delay, self._spawn, (worker.slot,)).start()
+
+    def _spawn(self, slot):
+        with self._lock:
+            if self._closed:
+                return
+            self._workers.append(_Worker(self._ctx, slot))
+            self._restarts += 1
+            self._lock.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def transcribe(audio_bytes, route, decode_options=None):
+    """Transcript and spoken phonemes (column form) for an upload, computed in
+    a worker process when SCORING_WORKERS is set."""
+    decode_options = decode_options or {}
+    if SCORING_WORKERS > 0:
+        return get_pool().call("transcribe", audio_bytes, route, decode_options)
+    return transcribe_clip(audio_bytes, route, decode_options)
+
+
+def transcribe_decoded(samples, route, decode_options=None):
+    """transcribe() for PCM that was decoded elsewhere, e.g. a streamed upload."""
+    decode_options = decode_options or {}
+    if SCORING_WORKERS > 0:
+        return get_pool().call("transcribe_samples", samples, route, decode_options)
+    return transcribe_samples(samples, route, decode_options)
+
+
+@lru_cache(maxsize=phonemes.G2P_CACHE_SIZE)
+def _remote_phonemes(text):
+    return get_pool().call("phonemes", text)
+
+
+def text_phonemes(text):
+    """G2P for a target text, without loading G2P into the web process when
+    workers are enabled."""
+    if SCORING_WORKERS > 0:
+        return _remote_phonemes(phonemes.normalize(text))
+    return phonemes.phonemes(text)
+
+
+def stats():
+    return get_pool().stats() if SCORING_WORKERS > 0 else None
@@ -113,6 +113,7 @@ export default function ChallengePractice({ challenge, user, onBack }) {
     try {
       const res = await fetch(`${API}/challenge/practice`, {
         method: "POST",
+        headers: { Authorization: `Bearer ${user.token}` },
         body: form,
       });
       const data = await res.json();
@@ -12,7 +12,9 @@ export default function History({ user }) {
     setLoading(true);
     setError(null);
     try {
-      const res = await fetch(`${API}/history?user_id=${user.id}`);
+      const res = await fetch(`${API}/history?user_id=${user.id}`, {
+        headers: { Authorization: `Bearer ${user.token}` },
+      });
       if (!res.ok) {
         throw new Error("Failed to fetch history data.");
       }
@@ -119,6 +119,7 @@ export default function Home({ user }) {
     try {
       const res = await fetch(`${API}/practice`, {
         method: "POST",
+        headers: { Authorization: `Bearer ${user.token}` },
         body: form,
       });
       const data = await res.json();
@@ -25,7 +25,7 @@ export default function Login({ onLogin, onSwitchToSignup }) {
         setErr(data.error || "Login failed");
         return;
       }
-      onLogin(data.user);
+      onLogin({ ...data.user, token: data.token });
     } catch (e) {
       setErr("Network error");
     } finally {
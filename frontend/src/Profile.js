@@ -20,7 +20,9 @@ export default function Profile({ user }) {
     setLoading(true);
     setError(null);
     try {
-      const res = await fetch(`${API}/profile?user_id=${user.id}`);
+      const res = await fetch(`${API}/profile?user_id=${user.id}`, {
+        headers: { Authorization: `Bearer ${user.token}` },
+      });
       if (!res.ok) {
         throw new Error("Failed to fetch profile data.");
       }